@@ -0,0 +1,169 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+# ==========================================
+# ⏱️ BENCHMARK: API-CALLS EN LOOPTIJD PER ACTIE
+# ==========================================
+# Draait streamlit_app.py met AppTest tegen de lokale backend (storage.LocalBackend)
+# met synthetische data, en meet per actie: requests, bytes heen/terug en looptijd.
+#
+#   python benchmarks/bench_actions.py --sizes 100 1000 --output bench.json
+#   python benchmarks/bench_actions.py --baseline bench.json   # exit 1 bij regressie
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_DIR, "streamlit_app.py")
+sys.path.insert(0, REPO_DIR)
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+import storage
+
+STATUSES = ['Te benaderen', 'Opgevolgd', 'Geen interesse', 'Geland 🎉', 'Prullenbak 🗑️']
+PIPELINE_HEADERS = ['Status', 'Bedrijf', 'Prijs', 'Contact', 'Email', 'Telefoon', 'Website', 'Projectmap', 'Notities', 'Onderhoud', 'ID']
+TASK_HEADERS = ['Status', 'Klant', 'Taak', 'Categorie', 'Deadline', 'Prioriteit', 'Notities', 'ID']
+HOUR_HEADERS = ['Datum', 'Klant', 'Uren', 'Omschrijving', 'Tarief', 'Totaal', 'ID']
+INSPIRATION_HEADERS = ['Naam', 'URL', 'Notitie', 'Tag', 'ID']
+
+
+# --- SYNTHETISCHE DATA ---
+def make_dataset(n, seed=42):
+    rnd = random.Random(seed)
+    companies = [f"Bedrijf {i:05d}" for i in range(n)]
+    leads = [PIPELINE_HEADERS] + [[STATUSES[i % 4] if i % 25 else STATUSES[4], c, f"€{rnd.randint(5, 60) * 100}", f"Contact {i}", f"info{i}@voorbeeld.nl", f"06{rnd.randint(10000000, 99999999)}", f"www.bedrijf{i}.nl", "", "Notitie " * rnd.randint(0, 5), "TRUE" if i % 7 == 0 else "FALSE", f"lead-{i}"] for i, c in enumerate(companies)]
+    tasks = [TASK_HEADERS] + [["TRUE" if i % 3 == 0 else "FALSE", rnd.choice(companies), f"Taak {i}", "Website Bouw", str(date(2024, 1, 1) + timedelta(days=i % 700)), "⏺️ Midden", "", f"task-{i}"] for i in range(n)]
+    hours = []
+    for i in range(n):
+        u = rnd.choice([0.25, 0.5, 1.0, 1.5, 2.0, 4.0])
+        hours.append([str(date(2022, 1, 1) + timedelta(days=i % 1000)), rnd.choice(companies[:max(1, n // 20)]), u, f"Werk {i}", 30, u * 30, f"hour-{i}"])
+    insp = [INSPIRATION_HEADERS] + [[f"Site {i}", f"www.site{i}.nl", "Mooi", "Algemeen", f"insp-{i}"] for i in range(max(10, n // 10))]
+    return {'Sheet1': leads, 'Taken': tasks, 'Uren': [HOUR_HEADERS] + hours, 'Inspiratie': insp}
+
+
+def register_backend(key, data, latency):
+    backend = storage.LocalBackend(None, latency=latency, measure_bytes=True)
+    for tab, rows in data.items(): backend.add_worksheet(tab, rows)
+    storage.LOCAL_BACKENDS[key] = backend
+    return backend
+
+
+# --- ACTIES ---
+def new_app(timeout):
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.secrets["passwords"] = {"mijn_wachtwoord": "bench"}
+    at.session_state["password_correct"] = True
+    return at
+
+
+def goto(at, page):
+    at.session_state["active_page"] = page
+    return at.run()
+
+
+def find_button(at, prefix):
+    return next(b for b in at.button if str(b.label).startswith(prefix))
+
+
+def build_actions(data):
+    lead_id = next(r[-1] for r in data['Sheet1'][1:] if r[0] == 'Te benaderen')
+    task_id = next(r[-1] for r in data['Taken'][1:] if r[0] == 'FALSE')  # open taak, zodat check() echt iets doet
+    insp_id = data['Inspiratie'][1][-1]
+
+    def cold_start(at): at.run()
+    def dashboard(at): goto(at, "Dashboard")
+    def pipeline_render(at): goto(at, "Pipeline")
+    def stage_move(at): at.button(key=f"r_{lead_id}").click().run()
+    def projecten_render(at): goto(at, "Projecten")
+    def task_toggle(at): at.checkbox(key=f"chk_{task_id}").check().run()
+    def uren_render(at): goto(at, "Uren")
+    def save_hour_queue(at):
+        at.session_state["hour_queue"] = [{"klant": data['Sheet1'][1][1], "datum": date.today(), "uren": 1.5, "desc": f"Bench {i}"} for i in range(5)]
+        at.run()
+        find_button(at, "💾 Alles Opslaan").click().run()
+    def inspiratie_render(at): goto(at, "Inspiratie")
+    def delete_inspiration(at): at.button(key=f"del_insp_{insp_id}").click().run()
+
+    # Volgorde telt: elke actie gaat uit van de pagina waar de vorige eindigde
+    return [
+        ("cold_start", cold_start), ("dashboard_render", dashboard),
+        ("pipeline_render", pipeline_render), ("stage_move", stage_move),
+        ("projecten_render", projecten_render), ("task_toggle", task_toggle),
+        ("uren_render", uren_render), ("save_hour_queue", save_hour_queue),
+        ("inspiratie_render", inspiratie_render), ("delete_inspiration", delete_inspiration),
+    ]
+
+
+def run_size(n, args):
+    key = f"bench-{n}"
+    data = make_dataset(n, seed=args.seed)
+    backend = register_backend(key, data, args.latency)
+    os.environ.update({"CRM_STORAGE_BACKEND": "local", "CRM_LOCAL_STORE_PATH": key, "CRM_WRITE_BEHIND": "false"})
+    st.cache_data.clear(); st.cache_resource.clear()
+
+    at = new_app(args.timeout)
+    results = []
+    for name, action in build_actions(data):
+        backend.reset_stats()
+        t0 = time.perf_counter()
+        error = None
+        try:
+            action(at)
+            if at.exception: error = str(at.exception[0].message)
+        except Exception as e: error = f"{type(e).__name__}: {e}"
+        wall = time.perf_counter() - t0
+        s = backend.get_stats()
+        results.append({"size": n, "action": name, "requests": s['requests'], "reads": s['reads'], "writes": s['writes'],
+                        "bytes_sent": s['bytes_sent'], "bytes_received": s['bytes_received'], "methods": s['methods'],
+                        "wall_s": round(wall, 4), "error": error})
+        print(f"  {n:>6} {name:<20} {s['requests']:>4} req  {s['bytes_sent']:>9} B out  {s['bytes_received']:>10} B in  {wall:8.3f} s" + (f"  ⚠️ {error}" if error else ""), file=sys.stderr)
+    return results
+
+
+# --- REGRESSIES ---
+def compare(results, baseline, tolerance):
+    base = {(r['size'], r['action']): r for r in baseline.get('results', [])}
+    problems = []
+    for r in results:
+        b = base.get((r['size'], r['action']))
+        if not b: continue
+        for field in ("requests", "bytes_sent", "bytes_received"):
+            if r[field] > b[field] * (1 + tolerance) and r[field] - b[field] > 1:
+                problems.append(f"{r['action']} @ {r['size']}: {field} {b[field]} -> {r[field]}")
+        if "clear" in r['methods'] and "clear" not in b['methods']:
+            problems.append(f"{r['action']} @ {r['size']}: gebruikt weer clear() (volledig herschrijven)")
+    return problems
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Meet API-calls, bytes en looptijd per gebruikersactie.")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--latency", type=float, default=0.0, help="Nagebootste vertraging per API-call (s)")
+    ap.add_argument("--timeout", type=float, default=600)
+    ap.add_argument("--output", help="JSON-resultaten naar dit bestand (anders stdout)")
+    ap.add_argument("--baseline", help="Vergelijk met eerdere JSON-output; exit 1 bij regressie")
+    ap.add_argument("--tolerance", type=float, default=0.10)
+    args = ap.parse_args()
+
+    results = []
+    for n in args.sizes: results.extend(run_size(n, args))
+    report = {"generated": time.strftime("%Y-%m-%dT%H:%M:%S"), "latency": args.latency, "results": results}
+    out = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: f.write(out)
+    else: print(out)
+
+    failed = any(r['error'] for r in results)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f: problems = compare(results, json.load(f), args.tolerance)
+        for p in problems: print(f"REGRESSIE: {p}", file=sys.stderr)
+        failed = failed or bool(problems)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# ==========================================
+# 🚀 BENCHMARK: KOUDE START PER SCHERM
+# ==========================================
+# Elk scherm (login + de vijf pagina's) draait in een vers Python-proces, zoals na een
+# container-herstart: de eerste AppTest-run betaalt dan alle imports. Per scherm meten we
+# de looptijd van die eerste run, een tweede (warme) run, en welke zware modules geladen zijn.
+#
+# Tijden hangen af van de machine: vergelijk alleen met een baseline van dezelfde machine.
+# Standaard controleert --baseline alleen welke zware modules elk scherm laadt; de tijden
+# tellen pas mee met --check-times.
+#
+#   python benchmarks/bench_startup.py --size 1000 --output startup.json
+#   python benchmarks/bench_startup.py --baseline startup.json                 # exit 1 bij extra imports
+#   python benchmarks/bench_startup.py --baseline startup.json --check-times   # ook koude start
+
+SCREENS = ["Login", "Dashboard", "Pipeline", "Projecten", "Uren", "Inspiratie"]
+HEAVY_MODULES = ["pandas", "gspread", "google.oauth2", "streamlit_calendar", "xlsxwriter", "exports"]
+
+
+def measure(screen, size, timeout):
+    # Draait in het kindproces: streamlit zelf is al geladen (zoals in de server), de app nog niet
+    from bench_actions import APP_PATH, AppTest, make_dataset, new_app, register_backend
+    import streamlit as st
+    register_backend("startup", make_dataset(size), 0.0)
+    os.environ.update({"CRM_STORAGE_BACKEND": "local", "CRM_LOCAL_STORE_PATH": "startup", "CRM_WRITE_BEHIND": "false"})
+    st.cache_data.clear(); st.cache_resource.clear()
+    preloaded = [m for m in HEAVY_MODULES if m in sys.modules]
+
+    if screen == "Login":
+        at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        at.secrets["passwords"] = {"mijn_wachtwoord": "bench"}
+    else:
+        at = new_app(timeout)
+        at.session_state["active_page"] = screen
+    t0 = time.perf_counter(); at.run(); cold = time.perf_counter() - t0
+    t0 = time.perf_counter(); at.run(); warm = time.perf_counter() - t0
+    return {"screen": screen, "size": size, "cold_s": round(cold, 4), "warm_s": round(warm, 4),
+            "loaded": [m for m in HEAVY_MODULES if m in sys.modules and m not in preloaded], "preloaded": preloaded,
+            "error": str(at.exception[0].message) if at.exception else None}
+
+
+def run_child(screen, args):
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", screen, "--size", str(args.size), "--timeout", str(args.timeout)]
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    try: return json.loads(proc.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError): return {"screen": screen, "size": args.size, "error": (proc.stderr.strip().splitlines() or ["geen output"])[-1]}
+
+
+def compare(results, baseline, tolerance, check_times=False):
+    base = {r['screen']: r for r in baseline.get('results', [])}
+    problems = []
+    for r in results:
+        b = base.get(r['screen'])
+        if not b or r.get('error') or b.get('error'): continue
+        if check_times and r['cold_s'] > b['cold_s'] * (1 + tolerance) and r['cold_s'] - b['cold_s'] > 0.05:
+            problems.append(f"{r['screen']}: koude start {b['cold_s']}s -> {r['cold_s']}s")
+        extra = sorted(set(r['loaded']) - set(b['loaded']))
+        if extra: problems.append(f"{r['screen']}: laadt nu ook {', '.join(extra)}")
+    return problems
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Meet de koude start (eerste run in een vers proces) per scherm.")
+    ap.add_argument("--size", type=int, default=1000)
+    ap.add_argument("--screens", nargs="+", default=SCREENS, choices=SCREENS)
+    ap.add_argument("--timeout", type=float, default=600)
+    ap.add_argument("--output", help="JSON-resultaten naar dit bestand (anders stdout)")
+    ap.add_argument("--baseline", help="Vergelijk met eerdere JSON-output; exit 1 bij regressie")
+    ap.add_argument("--check-times", action="store_true", help="Ook de koude starttijd vergelijken (alleen met een baseline van dezelfde machine)")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.size, args.timeout))); return
+
+    results = []
+    for screen in args.screens:
+        r = run_child(screen, args)
+        results.append(r)
+        if r.get('error'): print(f"  {screen:<12} ⚠️ {r['error']}", file=sys.stderr)
+        else: print(f"  {screen:<12} koud {r['cold_s']:7.3f} s  warm {r['warm_s']:7.3f} s  geladen: {', '.join(r['loaded']) or '-'}", file=sys.stderr)
+    report = {"generated": time.strftime("%Y-%m-%dT%H:%M:%S"), "size": args.size, "results": results}
+    out = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: f.write(out)
+    else: print(out)
+
+    failed = any(r.get('error') for r in results)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f: problems = compare(results, json.load(f), args.tolerance, args.check_times)
+        for p in problems: print(f"REGRESSIE: {p}", file=sys.stderr)
+        failed = failed or bool(problems)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import io
+import re
+import zipfile
+from datetime import date
+
+import pandas as pd
+
+
+# ==========================================
+# 📥 EXPORTS: CSV, FACTUURBIJLAGE (EXCEL) EN BULK ZIP
+# ==========================================
+# Pure functies op een uren-DataFrame (kolommen zoals het tabblad 'Uren'); cachen doet de app.
+EXPORT_COLUMNS = ['Datum', 'Omschrijving', 'Uren', 'Tarief', 'Totaal']
+XLSX_MIME = "application/vnd.ms-excel"
+
+
+def safe_name(name):
+    return re.sub(r'[\\/:*?"<>|\[\]]+', '_', str(name)).strip() or "Onbekend"
+
+
+def sheet_title(name, used):
+    # Excel: max 31 tekens en uniek binnen het werkboek
+    base = safe_name(name)[:31]
+    title, n = base, 2
+    while title.lower() in used:
+        suffix = f" ({n})"; title = base[:31 - len(suffix)] + suffix; n += 1
+    used.add(title.lower())
+    return title
+
+
+def hours_csv(df):
+    return df[EXPORT_COLUMNS].to_csv(index=False).encode('utf-8')
+
+
+def write_specification(writer, df, klant, sheet_name, theme_color):
+    df_export = df[EXPORT_COLUMNS]
+    df_export.to_excel(writer, sheet_name=sheet_name, startrow=4, index=False, header=True)
+    workbook = writer.book
+    worksheet = writer.sheets[sheet_name]
+    fmt_titel = workbook.add_format({'bold': True, 'font_size': 14, 'font_color': theme_color})
+    fmt_header = workbook.add_format({'bold': True, 'bg_color': '#f0f0f0', 'border': 1})
+    fmt_currency = workbook.add_format({'num_format': '€ #,##0.00'})
+    fmt_date = workbook.add_format({'num_format': 'dd-mm-yyyy'})
+    fmt_total = workbook.add_format({'bold': True, 'num_format': '€ #,##0.00', 'top': 6})
+
+    worksheet.write(0, 0, "Urenspecificatie", fmt_titel)
+    worksheet.write(1, 0, f"Klant: {klant}")
+    worksheet.write(2, 0, f"Datum export: {date.today().strftime('%d-%m-%Y')}")
+
+    worksheet.set_column('A:A', 12, fmt_date)
+    worksheet.set_column('B:B', 50)
+    worksheet.set_column('C:C', 8)
+    worksheet.set_column('D:D', 10, fmt_currency)
+    worksheet.set_column('E:E', 12, fmt_currency)
+
+    for col_num, value in enumerate(df_export.columns.values):
+        worksheet.write(4, col_num, value, fmt_header)
+
+    last_row = len(df_export) + 5
+    worksheet.write(last_row, 3, "TOTAAL:", fmt_header)
+    worksheet.write_formula(last_row, 4, f"=SUM(E6:E{last_row})", fmt_total)
+
+
+def specification_xlsx(groups, theme_color):
+    # groups: [(klant, df)]; één groep -> tabblad 'Specificatie', meer -> tabblad per klant
+    buffer = io.BytesIO()
+    used = set()
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        for klant, df in groups:
+            name = 'Specificatie' if len(groups) == 1 else sheet_title(klant, used)
+            write_specification(writer, df, klant, name, theme_color)
+    return buffer.getvalue()
+
+
+def specification_zip(groups, theme_color, stamp=None):
+    stamp = stamp or date.today()
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for klant, df in groups:
+            zf.writestr(f"Specificatie_{safe_name(klant)}_{stamp}.xlsx", specification_xlsx([(klant, df)], theme_color))
+    return buffer.getvalue()
+
+
+def group_by_client(df):
+    # Eén groupby over de selectie, oudste regels eerst
+    return [(klant, grp) for klant, grp in df.sort_values('Dag', kind='stable').groupby('Klant', sort=True)]
@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from itertools import count
+
+from scheduler import BACKGROUND, INTERACTIVE, method_kind
+from storage import payload_size
+
+
+# ==========================================
+# 🐞 INSTRUMENTATIE VAN SHEETS CALLS
+# ==========================================
+# Elke call op een werkblad (en spreadsheet.batch_update) wordt gelogd met methode,
+# tabblad, duur, payload-grootte en retries, getagd met sessie, rerun en pagina.
+# Payload-groottes (json.dumps van elke call) alleen als measure_bytes aan staat,
+# d.w.z. zodra het debug paneel open is; anders staan ze op 0.
+# Calls uit achtergrondthreads (write-behind, spiegel-sync) krijgen sessie 'background'
+# en bij de scheduler een lagere prioriteit dan calls uit een rerun.
+EVENT_FIELDS = ['time', 'session', 'rerun', 'page', 'tab', 'method', 'duration', 'bytes_sent', 'bytes_received', 'retries', 'ok', 'error']
+
+
+class ApiRecorder:
+    def __init__(self, max_events=20000, measure_bytes=False):
+        self.events = deque(maxlen=max_events)
+        self.measure_bytes = measure_bytes
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.rerun_seq = count(1)
+
+    def begin_rerun(self, session, page):
+        self.local.ctx = {'session': session, 'rerun': next(self.rerun_seq), 'page': page}
+
+    def context(self):
+        return getattr(self.local, 'ctx', None) or {'session': 'background', 'rerun': None, 'page': None}
+
+    def record(self, tab, method, duration, sent=None, received=None, ok=True, error=None):
+        ctx = self.context()
+        measure = self.measure_bytes
+        event = {
+            'time': time.time(), 'session': ctx['session'], 'rerun': ctx['rerun'], 'page': ctx['page'],
+            'tab': tab, 'method': method, 'duration': duration,
+            'bytes_sent': payload_size(sent) if measure and sent is not None else 0,
+            'bytes_received': payload_size(received) if measure and received is not None else 0,
+            'retries': getattr(self.local, 'retry', 0), 'ok': ok, 'error': error,
+        }
+        with self.lock: self.events.append(event)
+
+    @contextmanager
+    def retry(self, tab, delay):
+        # Wachttijd wordt als eigen event gelogd; calls binnen dit blok tellen als retry
+        t0 = time.perf_counter(); time.sleep(delay)
+        self.record(tab, 'retry_sleep', time.perf_counter() - t0)
+        self.local.retry = getattr(self.local, 'retry', 0) + 1
+        try: yield
+        finally: self.local.retry -= 1
+
+    def timed(self, tab, method, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        sent = (args or kwargs) or None
+        try: result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record(tab, method, time.perf_counter() - t0, sent=sent, ok=False, error=f"{type(e).__name__}: {e}")
+            raise
+        self.record(tab, method, time.perf_counter() - t0, sent=sent, received=getattr(result, 'value', result))
+        return result
+
+    # --- UITLEZEN ---
+    def get_events(self, session=None, rerun=None):
+        with self.lock: events = list(self.events)
+        return [e for e in events if (session is None or e['session'] == session) and (rerun is None or e['rerun'] == rerun)]
+
+    @staticmethod
+    def summarize(events, *keys):
+        out = {}
+        for e in events:
+            k = tuple(e[key] for key in keys)
+            s = out.setdefault(k, {**dict(zip(keys, k)), 'calls': 0, 'duration': 0.0, 'bytes_sent': 0, 'bytes_received': 0, 'retries': 0, 'errors': 0})
+            s['calls'] += 0 if e['method'] == 'retry_sleep' else 1
+            s['duration'] += e['duration']
+            s['bytes_sent'] += e['bytes_sent']; s['bytes_received'] += e['bytes_received']
+            s['retries'] += 1 if e['method'] == 'retry_sleep' else 0
+            s['errors'] += 0 if e['ok'] else 1
+        return sorted(out.values(), key=lambda s: -s['duration'])
+
+    @staticmethod
+    def to_json(events):
+        return json.dumps(events, indent=2, ensure_ascii=False, default=str)
+
+    @staticmethod
+    def to_csv(events):
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=EVENT_FIELDS)
+        writer.writeheader(); writer.writerows(events)
+        return buf.getvalue()
+
+
+def call_api(recorder, scheduler, tab, method, fn, *args, **kwargs):
+    # Getimed door de recorder en (als die er is) door de scheduler geknepen en herhaald
+    if scheduler is None: return recorder.timed(tab, method, fn, *args, **kwargs)
+    priority = BACKGROUND if recorder.context()['session'] == 'background' else INTERACTIVE
+    return scheduler.run(method_kind(method), lambda: recorder.timed(tab, method, fn, *args, **kwargs), tab=tab, priority=priority)
+
+
+class InstrumentedSpreadsheet:
+    def __init__(self, spreadsheet, recorder, tab, scheduler=None):
+        self._inner, self._recorder, self._tab, self._scheduler = spreadsheet, recorder, tab, scheduler
+
+    def batch_update(self, body):
+        return call_api(self._recorder, self._scheduler, self._tab, 'spreadsheet.batch_update', self._inner.batch_update, body)
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+
+class InstrumentedWorksheet:
+    # Proxy rond een gspread (of lokaal) werkblad; methodes worden getimed, attributen doorgegeven
+    def __init__(self, worksheet, recorder, tab, scheduler=None):
+        self._inner, self._recorder, self._tab, self._scheduler = worksheet, recorder, tab, scheduler
+        self.spreadsheet = InstrumentedSpreadsheet(worksheet.spreadsheet, recorder, tab, scheduler)
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not callable(attr) or name.startswith('_'): return attr
+        def wrapper(*args, **kwargs): return call_api(self._recorder, self._scheduler, self._tab, name, attr, *args, **kwargs)
+        return wrapper
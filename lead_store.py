@@ -0,0 +1,95 @@
+import sys
+from itertools import chain
+
+
+# ==========================================
+# 🗂️ COMPACTE OPSLAG VAN PIPELINE LEADS
+# ==========================================
+# Lead = object met __slots__ (geen dict per lead), maar met dezelfde lees/schrijf-API
+# als de oude dicts (lead['name'], lead.get('price'), copy, update), zodat de pagina's
+# niets merken. LeadStore = de bekende {'col1': [...], ..., 'trash': [...]}, plus
+# afgeleide lijsten (namen, selectbox-opties) die pas na een mutatie opnieuw worden gemaakt.
+LEAD_FIELDS = ('id', 'name', 'price', 'contact', 'email', 'phone', 'website', 'project_map', 'notes', 'maintenance')
+COLUMN_KEYS = ('col1', 'col2', 'col3', 'col4', 'trash')
+
+
+class Lead:
+    __slots__ = LEAD_FIELDS
+
+    def __init__(self, **fields):
+        for f in LEAD_FIELDS: setattr(self, f, fields.get(f))
+        self.maintenance = bool(self.maintenance)
+
+    @classmethod
+    def from_dict(cls, data):
+        return data if isinstance(data, cls) else cls(**data)
+
+    def __getitem__(self, key):
+        try: return getattr(self, key)
+        except (AttributeError, TypeError): raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in LEAD_FIELDS: raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in LEAD_FIELDS
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in LEAD_FIELDS else default
+
+    def keys(self):
+        return LEAD_FIELDS
+
+    def items(self):
+        return [(f, getattr(self, f)) for f in LEAD_FIELDS]
+
+    def update(self, data):
+        for k, v in dict(data).items(): self[k] = v
+
+    def copy(self):
+        return Lead(**dict(self.items()))
+
+    def __eq__(self, other):
+        return isinstance(other, Lead) and self.items() == other.items()
+
+    def __repr__(self):
+        return f"Lead({self.id!r}, {self.name!r})"
+
+
+class LeadStore(dict):
+    def __init__(self, columns=None):
+        super().__init__({k: [] for k in COLUMN_KEYS})
+        for k, items in (columns or {}).items(): self[sys.intern(k)] = [Lead.from_dict(l) for l in items]
+        self.revision = 0
+        self._derived = {}
+
+    def touch(self):
+        # Na elke mutatie: afgeleide lijsten opnieuw laten opbouwen
+        self.revision += 1
+        self._derived.clear()
+
+    def iter_leads(self, keys=COLUMN_KEYS):
+        # Door de kolommen heen zonder kopie
+        return chain.from_iterable(self[k] for k in keys)
+
+    def count(self, keys=COLUMN_KEYS):
+        return sum(len(self[k]) for k in keys)
+
+    def _cached(self, name, build):
+        if name not in self._derived: self._derived[name] = build()
+        return self._derived[name]
+
+    def names(self):
+        return self._cached('names', lambda: sorted(l.name for l in self.iter_leads()))
+
+    def select_options(self):
+        # Label -> ID voor de deal-selectbox; dubbele namen krijgen een stukje ID erbij
+        def build():
+            opts = {}
+            for l in self.iter_leads():
+                lbl = l.name
+                if lbl in opts: lbl = f"{l.name} ({l.id[:4]})"
+                opts[lbl] = l.id
+            return opts
+        return self._cached('select_options', build)
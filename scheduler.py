@@ -0,0 +1,144 @@
+import heapq
+import random
+import threading
+import time
+from contextlib import contextmanager
+from itertools import count
+
+
+# ==========================================
+# 🚦 REQUEST SCHEDULER VOOR SHEETS CALLS
+# ==========================================
+# Elke call gaat via run(): eerst een token uit de lees- of schrijfemmer (gevuld op het
+# tempo van het quotum per minuut), daarna de call zelf. Wachten gebeurt op prioriteit:
+# interactieve calls (uit een rerun) gaan voor achtergrondwerk (write-behind, spiegel).
+# Bij 429 en 5xx: opnieuw proberen met exponentiële backoff en "full jitter".
+# Writes zijn niet idempotent (append_rows, rijen verwijderen op index): die herhalen we hier
+# alleen als zeker is dat er niets is aangekomen (429, of geen verbinding gekregen). Anders
+# gaat de fout naar de write-behind, die de rijen eerst opnieuw op ID opzoekt.
+# Elke fout gaat ook naar on_error: bij 401 (token verlopen) en 404 (tabblad hernoemd of
+# opnieuw aangemaakt) gooit de app daar de gecachete handles weg.
+INTERACTIVE = 0
+BACKGROUND = 1
+
+READ_METHODS = {'open', 'get_all_records', 'get_all_values', 'cell', 'acell', 'col_values', 'row_values', 'batch_get', 'get', 'values_batch_get', 'fetch_sheet_metadata', 'worksheets'}
+
+
+def method_kind(method):
+    return 'read' if method in READ_METHODS else 'write'
+
+
+def error_status(exc):
+    # gspread.exceptions.APIError heeft een requests-response; anders geen HTTP-status
+    resp = getattr(exc, 'response', None)
+    status = getattr(resp, 'status_code', None) or getattr(exc, 'code', None)
+    return status if isinstance(status, int) else None
+
+
+# Fouten van vóór het versturen (requests/urllib3 en ingebouwd)
+PRE_SEND_ERRORS = {'ConnectTimeout', 'ConnectTimeoutError', 'NewConnectionError', 'NameResolutionError', 'ConnectionRefusedError', 'ProxyError'}
+
+
+def not_sent(exc):
+    # requests verpakt de urllib3-fout: ConnectionError(MaxRetryError(reason=NewConnectionError))
+    reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+    return any(c.__name__ in PRE_SEND_ERRORS for e in (exc, reason) if e is not None for c in type(e).__mro__)
+
+
+def is_retryable(exc, kind='read'):
+    status = error_status(exc)
+    if kind == 'write': return status == 429 or (status is None and not_sent(exc))
+    if status is not None: return status == 429 or status >= 500
+    # Netwerkfouten: ingebouwd of uit requests (waar gspread op draait)
+    return isinstance(exc, (ConnectionError, TimeoutError)) or type(exc).__module__.startswith('requests')
+
+
+def is_stale_handle(exc):
+    return error_status(exc) in (401, 404)
+
+
+@contextmanager
+def plain_sleep(tab, delay):
+    time.sleep(delay)
+    yield
+
+
+class TokenBucket:
+    def __init__(self, per_minute, burst=None):
+        self.rate = per_minute / 60.0 if per_minute else None
+        self.capacity = burst or max(1, int(per_minute or 0) // 10)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.waiters = []
+
+    def refill(self):
+        now = time.monotonic()
+        if self.rate: self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        return 0.0 if not self.rate or self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class RequestScheduler:
+    def __init__(self, read_per_minute=60, write_per_minute=60, burst=None, max_retries=5, base_delay=1.0, max_delay=32.0, retry_ctx=None, on_error=None):
+        self.buckets = {'read': TokenBucket(read_per_minute, burst), 'write': TokenBucket(write_per_minute, burst)}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_ctx = retry_ctx or plain_sleep
+        self.on_error = on_error
+        self.cond = threading.Condition()
+        self.seq = count()
+        self.counters = {'calls': 0, 'queued': 0, 'queue_time': 0.0, 'throttled': 0, 'server_errors': 0, 'retries': 0, 'gave_up': 0}
+
+    def acquire(self, kind, priority=INTERACTIVE):
+        bucket = self.buckets[kind]
+        if not bucket.rate: return 0.0
+        t0 = time.monotonic()
+        with self.cond:
+            ticket = (priority, next(self.seq))
+            heapq.heappush(bucket.waiters, ticket)
+            while True:
+                bucket.refill()
+                if bucket.waiters[0] == ticket and bucket.tokens >= 1:
+                    heapq.heappop(bucket.waiters)
+                    bucket.tokens -= 1
+                    self.cond.notify_all()
+                    break
+                # Alleen de kop van de rij weet hoe lang hij moet wachten; de rest wacht op een seintje
+                self.cond.wait(bucket.wait_time() if bucket.waiters[0] == ticket else None)
+            waited = time.monotonic() - t0
+            if waited > 0.001: self.counters['queued'] += 1; self.counters['queue_time'] += waited
+        return waited
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _call(self, kind, priority, fn):
+        self.acquire(kind, priority)
+        with self.cond: self.counters['calls'] += 1
+        return fn()
+
+    def run(self, kind, fn, tab=None, priority=INTERACTIVE):
+        attempt = 0
+        while True:
+            try:
+                if attempt == 0: return self._call(kind, priority, fn)
+                # Eerst de backoff uitzitten (zonder token vast te houden), dan opnieuw in de rij
+                with self.retry_ctx(tab, self.backoff(attempt - 1)): return self._call(kind, priority, fn)
+            except Exception as e:
+                if self.on_error: self.on_error(e)
+                if not is_retryable(e, kind) or attempt >= self.max_retries:
+                    if is_retryable(e, kind):
+                        with self.cond: self.counters['gave_up'] += 1
+                    raise
+                with self.cond:
+                    self.counters['throttled' if error_status(e) == 429 else 'server_errors'] += 1
+                    self.counters['retries'] += 1
+                attempt += 1
+
+    def stats(self):
+        with self.cond:
+            for b in self.buckets.values(): b.refill()
+            return {**self.counters, **{f"{k}_tokens": round(b.tokens, 2) if b.rate else None for k, b in self.buckets.items()}, **{f"{k}_waiting": len(b.waiters) for k, b in self.buckets.items()}}
@@ -0,0 +1,118 @@
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from itertools import islice
+
+
+# ==========================================
+# 🔎 ZOEKINDEX OVER LEADS, TAKEN, UREN EN INSPIRATIE
+# ==========================================
+# Omgekeerde index: woord -> documenten. Woorden worden zonder accenten en in kleine
+# letters opgeslagen; een gesorteerde woordenlijst maakt prefix-zoeken een bisect.
+# Documenten zijn (soort, id) met een titel en ondertitel voor de resultatenlijst, en een
+# vrije 'ref' (bv. de klant) zodat de app meteen naar de juiste plek kan springen.
+# Grote hoeveelheden in één keer via load(): woordenlijst één keer sorteren i.p.v. insort per woord.
+# Brede prefixen ('b', '06') lopen niet de hele woordenlijst af: exacte treffers eerst, dan
+# prefix-treffers tot PREFIX_LIMIT documenten; daarbinnen wordt gerangschikt.
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+FILTER_LIMIT = 2000
+PREFIX_LIMIT = 2000
+SHORT_PREFIX = 2
+
+
+def normalize(text):
+    text = str(text or "")
+    if text.isascii(): return text.lower()
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(*values):
+    tokens = set()
+    for v in values:
+        norm = normalize(v)
+        tokens.update(TOKEN_RE.findall(norm))
+        # Telefoonnummers ook als één reeks cijfers ("06-1234 5678" -> "0612345678")
+        digits = re.sub(r"\D", "", norm)
+        if len(digits) >= 6: tokens.add(digits)
+    return tokens
+
+
+class SearchIndex:
+    def __init__(self):
+        self.docs = {}
+        self.postings = {}
+        self.vocab = []
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, kind, doc_id, title, subtitle="", fields=(), ref=None, _sort=True):
+        key = (kind, str(doc_id))
+        self.remove(kind, doc_id, _sort)
+        tokens = tokenize(title, *fields)
+        self.docs[key] = {'kind': kind, 'id': str(doc_id), 'title': str(title or ""), 'subtitle': str(subtitle or ""), 'ref': ref, 'tokens': tokens, 'title_tokens': tokenize(title)}
+        for t in tokens:
+            posting = self.postings.get(t)
+            if posting is None:
+                posting = self.postings[t] = set()
+                if _sort: insort(self.vocab, t)
+            posting.add(key)
+
+    def remove(self, kind, doc_id, _sort=True):
+        doc = self.docs.pop((kind, str(doc_id)), None)
+        if not doc: return
+        for t in doc['tokens']:
+            posting = self.postings.get(t)
+            if posting is None: continue
+            posting.discard((kind, str(doc_id)))
+            if not posting:
+                del self.postings[t]
+                if not _sort: continue
+                i = bisect_left(self.vocab, t)
+                if i < len(self.vocab) and self.vocab[i] == t: del self.vocab[i]
+
+    def load(self, docs, kind=None):
+        # Bulk: (eerst alle documenten van `kind` weg, dan) alles toevoegen en één keer sorteren.
+        # docs: (kind, id, title, subtitle, fields, ref)
+        if kind is not None:
+            for key in [k for k in self.docs if k[0] == kind]: self.remove(*key, _sort=False)
+        for d in docs: self.add(*d, _sort=False)
+        self.vocab = sorted(self.postings)
+
+    def _prefix_matches(self, prefix, limit=None):
+        # Exacte treffers eerst; met limit stoppen zodra er genoeg documenten zijn
+        exact = self.postings.get(prefix, ())
+        out = set(islice(exact, limit) if limit else exact)
+        i = bisect_left(self.vocab, prefix)
+        while i < len(self.vocab) and self.vocab[i].startswith(prefix):
+            if not limit: out |= self.postings[self.vocab[i]]
+            elif len(out) >= limit: break
+            else: out.update(islice(self.postings[self.vocab[i]], limit - len(out)))
+            i += 1
+        return out
+
+    def search(self, query, limit=20, kinds=None):
+        terms = sorted(set(TOKEN_RE.findall(normalize(query))), key=len, reverse=True)
+        if not terms: return []
+        # Alle termen moeten (als prefix) voorkomen; langste term eerst = kleinste set.
+        # Is de set al klein, dan filteren we de gevonden documenten i.p.v. de woordenlijst te doorlopen.
+        hits = None
+        for term in terms:
+            if hits is not None and len(hits) <= FILTER_LIMIT:
+                hits = {k for k in hits if any(t.startswith(term) for t in self.docs[k]['tokens'])}
+            else:
+                # Eén term of een heel korte: alleen de eerste PREFIX_LIMIT documenten hoeven we te rangschikken
+                cap = PREFIX_LIMIT if len(terms) == 1 or len(term) <= SHORT_PREFIX else None
+                matches = self._prefix_matches(term, cap)
+                hits = matches if hits is None else hits & matches
+            if not hits: return []
+        if kinds: hits = {k for k in hits if k[0] in kinds}
+
+        def rank(key):
+            doc = self.docs[key]
+            exact = sum(1 for t in terms if t in doc['tokens'])
+            in_title = sum(1 for t in terms if any(w.startswith(t) for w in doc['title_tokens']))
+            return (-in_title, -exact, doc['title'].lower())
+        return [{k: v for k, v in self.docs[key].items() if k not in ('tokens', 'title_tokens')} for key in heapq.nsmallest(limit, hits, key=rank)]
@@ -0,0 +1,119 @@
+import json
+import sqlite3
+import threading
+import time
+
+# Kolommen waarop een index komt (als het tabblad ze heeft)
+INDEXED_COLUMNS = ('ID', 'Klant', 'Datum')
+
+
+# ==========================================
+# 🗄️ LOKALE SQLITE SPIEGEL VAN DE GOOGLE SHEET
+# ==========================================
+# Elk tabblad wordt één tabel met kolommen c0..cN (headers staan in _tabs),
+# zodat rare headers als 'ID ' of lege kolomnamen geen problemen geven.
+class SheetMirror:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS _tabs (tab TEXT PRIMARY KEY, headers TEXT, synced_at REAL)")
+        self.conn.commit()
+        self.dirty = set()
+        self.generation = {}
+        self.synced_stamp = {}
+        self.sync_thread = None
+
+    def _table(self, tab):
+        return '"t_' + tab.replace('"', '""') + '"'
+
+    def headers(self, tab):
+        with self.lock:
+            row = self.conn.execute("SELECT headers FROM _tabs WHERE tab = ?", (tab,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def has_tab(self, tab):
+        return self.headers(tab) is not None
+
+    def is_fresh(self, tab):
+        return tab not in self.dirty and self.has_tab(tab)
+
+    def mark_dirty(self, tab=None):
+        with self.lock:
+            tabs = [tab] if tab else list(self.generation.keys())
+            for t in tabs:
+                self.dirty.add(t)
+                self.generation[t] = self.generation.get(t, 0) + 1
+
+    def replace_tab(self, tab, records, generation=None):
+        # Volledige reconcile in één transactie: lezers zien de oude óf de nieuwe versie
+        with self.lock:
+            if generation is not None and self.generation.get(tab, 0) != generation: return False
+            headers = list(records[0].keys()) if records else (self.headers(tab) or [])
+            cols = [f"c{i}" for i in range(len(headers))]
+            table = self._table(tab)
+            with self.conn:
+                self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+                self.conn.execute(f"CREATE TABLE {table} (_row INTEGER PRIMARY KEY{''.join(', ' + c for c in cols)})")
+                for i, h in enumerate(headers):
+                    if str(h).strip() in INDEXED_COLUMNS:
+                        self.conn.execute(f'CREATE INDEX "ix_{tab}_{i}" ON {table} (c{i})')
+                if cols:
+                    ph = ", ".join("?" for _ in range(len(cols) + 1))
+                    self.conn.executemany(f"INSERT INTO {table} VALUES ({ph})", ((n + 2, *[r.get(h, '') for h in headers]) for n, r in enumerate(records)))
+                self.conn.execute("INSERT OR REPLACE INTO _tabs VALUES (?, ?, ?)", (tab, json.dumps(headers), time.time()))
+            self.dirty.discard(tab)
+            self.generation.setdefault(tab, 0)
+            return True
+
+    def get_records(self, tab, **where):
+        headers = self.headers(tab)
+        if headers is None: return []
+        sql = f"SELECT * FROM {self._table(tab)}"
+        params = []
+        conds = []
+        for col, val in where.items():
+            if col not in headers: return []
+            conds.append(f"c{headers.index(col)} = ?"); params.append(val)
+        if conds: sql += " WHERE " + " AND ".join(conds)
+        with self.lock:
+            rows = self.conn.execute(sql + " ORDER BY _row", params).fetchall()
+        return [dict(zip(headers, r[1:])) for r in rows]
+
+    def row_number(self, tab, col, value):
+        headers = self.headers(tab)
+        if not headers or col not in headers: return None
+        with self.lock:
+            row = self.conn.execute(f"SELECT _row FROM {self._table(tab)} WHERE c{headers.index(col)} = ? LIMIT 1", (value,)).fetchone()
+        return row[0] if row else None
+
+    # --- ACHTERGROND SYNC ---
+    # Met stamp (wijzigingsstempel van de spreadsheet) alleen ophalen als het tabblad vuil is
+    # of de stempel sinds de vorige sync is veranderd; anders kost een ronde geen quotum.
+    def needs_sync(self, tab, stamp):
+        return stamp is None or tab in self.dirty or not self.has_tab(tab) or self.synced_stamp.get(tab) != stamp
+
+    def sync_tab(self, tab, fetch, stamp=None):
+        gen = self.generation.get(tab, 0)
+        records = fetch(tab)
+        if records is None: return False
+        ok = self.replace_tab(tab, records, generation=gen)
+        if ok: self.synced_stamp[tab] = stamp
+        return ok
+
+    def start_sync(self, tabs, fetch, interval=60, stamp=None):
+        if self.sync_thread: return
+        for t in tabs: self.generation.setdefault(t, 0)
+
+        def loop():
+            while True:
+                try: current = stamp() if stamp else None
+                except Exception: current = None
+                for t in tabs:
+                    if not self.needs_sync(t, current): continue
+                    try: self.sync_tab(t, fetch, current)
+                    except Exception: pass
+                time.sleep(interval)
+
+        self.sync_thread = threading.Thread(target=loop, name="sheet-mirror-sync", daemon=True)
+        self.sync_thread.start()
@@ -0,0 +1,59 @@
+import importlib
+import statistics
+import threading
+import time
+from collections import deque
+
+
+# ==========================================
+# 🚀 KOUDE START: LUIE IMPORTS EN LAADTIJDEN PER SCHERM
+# ==========================================
+# LazyModule importeert een zware module (pandas, exports, ...) pas bij het eerste gebruik
+# en gedraagt zich daarna als de module zelf; de importtijd komt in IMPORT_TIMES.
+# StartupLog houdt per scherm (login, Dashboard, Pipeline, ...) bij hoe lang het duurde van
+# het begin van het script tot het scherm klaar was, apart voor de eerste run van het proces.
+IMPORT_TIMES = {}
+
+
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            t0 = time.perf_counter()
+            self._module = importlib.import_module(self._name)
+            IMPORT_TIMES.setdefault(self._name, time.perf_counter() - t0)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+class StartupLog:
+    def __init__(self, history=500):
+        self.lock = threading.Lock()
+        self.runs = 0
+        self.entries = deque(maxlen=history)
+
+    def begin(self):
+        # -> True voor de allereerste run in dit proces (koude start)
+        with self.lock:
+            self.runs += 1
+            return self.runs == 1
+
+    def record(self, screen, seconds, cold=False):
+        with self.lock: self.entries.append({'screen': screen, 'seconds': seconds, 'cold': cold, 'at': time.time()})
+
+    def summary(self):
+        with self.lock: entries = list(self.entries)
+        out = {}
+        for e in entries: out.setdefault(e['screen'], []).append(e)
+        return [{
+            'scherm': screen,
+            'runs': len(es),
+            'koud_ms': next((round(e['seconds'] * 1000) for e in es if e['cold']), None),
+            'mediaan_ms': round(statistics.median(e['seconds'] for e in es) * 1000),
+            'laatste_ms': round(es[-1]['seconds'] * 1000),
+        } for screen, es in out.items()]
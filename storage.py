@@ -0,0 +1,335 @@
+import json
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+# ==========================================
+# 💾 OPSLAG BACKENDS
+# ==========================================
+# De app praat met werkbladen via de gspread Worksheet-API (get_all_records, update,
+# clear, append_row(s), update_cell, cell, col_values, batch_get, batch_update en
+# spreadsheet.batch_update voor het verwijderen van rijen). SheetsBackend geeft echte
+# gspread werkbladen terug; LocalBackend is een stand-in met hetzelfde gedrag die in
+# het geheugen of in een JSON-bestand werkt, zodat we offline kunnen testen en meten.
+class StorageBackend(ABC):
+    @abstractmethod
+    def worksheet(self, name): ...
+
+    def invalidate(self):
+        pass  # niets gecachet
+
+
+class SheetsBackend(StorageBackend):
+    # Spreadsheet en werkbladen worden één keer geopend (op key, anders op titel) en
+    # daarna hergebruikt. Opnieuw openen, met een verse client en dus een vers token,
+    # gebeurt na max_age seconden, na invalidate(), of als een werkblad ontbreekt.
+    def __init__(self, client_factory, title, key=None, max_age=3000, api_call=None):
+        self.client_factory = client_factory
+        self.title = title
+        self.key = key
+        self.max_age = max_age
+        self.api_call = api_call or (lambda method, fn, *args: fn(*args))
+        # RLock: een fout tijdens _open kan via de scheduler invalidate() aanroepen
+        self.lock = threading.RLock()
+        self.spreadsheet = None
+        self.worksheets = {}
+        self.opened_at = 0.0
+
+    def _open(self):
+        client = self.client_factory()
+        if client is None: raise RuntimeError("Geen Google client")
+        if self.key: spreadsheet = self.api_call('open', client.open_by_key, self.key)
+        else: spreadsheet = self.api_call('open', client.open, self.title)
+        self.worksheets = {ws.title: ws for ws in self.api_call('worksheets', spreadsheet.worksheets)}
+        self.spreadsheet = spreadsheet
+        self.opened_at = time.time()
+
+    def _current(self):
+        with self.lock:
+            if self.spreadsheet is None or time.time() - self.opened_at > self.max_age: self._open()
+            return self.spreadsheet
+
+    def values_batch_get(self, ranges):
+        return self._current().values_batch_get(ranges)
+
+    def last_modified(self):
+        # Drive modifiedTime van de hele spreadsheet (gspread 6: methode, gspread 5: property)
+        spreadsheet = self._current()
+        getter = getattr(spreadsheet, 'get_lastUpdateTime', None)
+        return getter() if getter else spreadsheet.lastUpdateTime
+
+    def invalidate(self):
+        with self.lock: self.spreadsheet = None; self.worksheets = {}
+
+    def worksheet(self, name):
+        with self.lock:
+            if self.spreadsheet is None or time.time() - self.opened_at > self.max_age: self._open()
+            if name not in self.worksheets: self._open()  # net aangemaakt tabblad?
+            if name not in self.worksheets: raise KeyError(f"Werkblad '{name}' bestaat niet")
+            return self.worksheets[name]
+
+
+# --- HULPFUNCTIES (zelfde conventies als gspread) ---
+def a1_to_rowcol(label):
+    m = re.match(r"^([A-Za-z]+)(\d+)$", label.strip())
+    if not m: raise ValueError(f"Ongeldige cel: {label}")
+    col = 0
+    for ch in m.group(1).upper(): col = col * 26 + ord(ch) - 64
+    return int(m.group(2)), col
+
+
+def rowcol_to_a1(row, col):
+    # Zoals gspread.utils.rowcol_to_a1, zonder gspread te hoeven importeren
+    letters = ""
+    while col > 0:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return f"{letters}{row}"
+
+
+def parse_range(label):
+    if "!" in label: label = label.split("!", 1)[1]
+    start, _, end = label.partition(":")
+    return a1_to_rowcol(start), a1_to_rowcol(end or start)
+
+
+def numericise(value):
+    # Precies gspread.utils.numericise: "12" -> 12, "1.5" -> 1.5, "2,000.1" -> 2000.1 (komma's
+    # zijn duizendtallen, dus ook "1,5" -> 15), de rest blijft tekst
+    if not isinstance(value, str) or "_" in value: return value
+    cleaned = value.replace(",", "")
+    try: return int(cleaned)
+    except ValueError:
+        try: return float(cleaned)
+        except ValueError: return value
+
+
+def to_cell(value):
+    # Wat Sheets bij RAW-invoer als opgemaakte waarde teruggeeft
+    if value is None: return ""
+    if isinstance(value, bool): return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer(): return str(int(value))
+    return str(value)
+
+
+def records_from_values(values):
+    # Zoals get_all_records: eerste rij = headers, rest aangevuld tot de breedte en genumeriseerd
+    if not values: return []
+    headers = values[0]
+    return [dict(zip(headers, [numericise(v) for v in list(r) + [""] * (len(headers) - len(r))])) for r in values[1:]]
+
+
+def tab_range(name):
+    # Heel tabblad als A1-range; quotes verdubbelen zoals Sheets verwacht
+    return "'" + str(name).replace("'", "''") + "'"
+
+
+class LocalCell:
+    def __init__(self, row, col, value):
+        self.row, self.col, self.value = row, col, value
+
+
+class LocalWorksheet:
+    def __init__(self, backend, title, sheet_id):
+        self.backend = backend
+        self.title = title
+        self.id = sheet_id
+        self.spreadsheet = backend
+
+    @property
+    def rows(self):
+        return self.backend.data[self.title]
+
+    def _set(self, row, col, value):
+        rows = self.rows
+        while len(rows) < row: rows.append([])
+        cells = rows[row - 1]
+        while len(cells) < col: cells.append("")
+        cells[col - 1] = to_cell(value)
+
+    def _write_block(self, row, col, values):
+        for i, vals in enumerate(values):
+            for j, v in enumerate(vals): self._set(row + i, col + j, v)
+
+    def _trim(self):
+        rows = self.rows
+        while rows and not any(rows[-1]): rows.pop()
+
+    # --- LEZEN ---
+    def get_all_values(self):
+        with self.backend.call("get_all_values", self.title) as c:
+            width = max((len(r) for r in self.rows), default=0)
+            c.received = [list(r) + [""] * (width - len(r)) for r in self.rows]
+            return c.received
+
+    def get_all_records(self):
+        with self.backend.call("get_all_records", self.title) as c:
+            c.received = self.rows
+            return records_from_values(self.rows)
+
+    def cell(self, row, col):
+        with self.backend.call("cell", self.title) as c:
+            try: c.received = self.rows[row - 1][col - 1]
+            except IndexError: c.received = ""
+            return LocalCell(row, col, c.received)
+
+    def col_values(self, col):
+        with self.backend.call("col_values", self.title) as c:
+            vals = [r[col - 1] if len(r) >= col else "" for r in self.rows]
+            while vals and vals[-1] == "": vals.pop()
+            c.received = vals
+            return vals
+
+    def batch_get(self, ranges):
+        with self.backend.call("batch_get", self.title, sent=ranges) as c:
+            out = c.received = []
+            for label in ranges:
+                (r1, c1), (r2, c2) = parse_range(label)
+                block = [[(self.rows[r - 1][c - 1] if r <= len(self.rows) and c <= len(self.rows[r - 1]) else "") for c in range(c1, c2 + 1)] for r in range(r1, r2 + 1)]
+                out.append([b for b in block if any(b)])
+            return out
+
+    # --- SCHRIJVEN ---
+    def update(self, values=None, range_name=None, **kwargs):
+        # Ondersteunt zowel update(rows) als de oude volgorde update("A1", rows)
+        if isinstance(values, str) and not isinstance(range_name, str): values, range_name = range_name, values
+        with self.backend.call("update", self.title, write=True, sent=[range_name, values]):
+            row, col = parse_range(range_name)[0] if range_name else (1, 1)
+            self._write_block(row, col, values or [])
+
+    def batch_update(self, data, **kwargs):
+        with self.backend.call("batch_update", self.title, write=True, sent=data):
+            for d in data:
+                (row, col), _ = parse_range(d["range"])
+                self._write_block(row, col, d["values"])
+
+    def update_cell(self, row, col, value):
+        with self.backend.call("update_cell", self.title, write=True, sent=[row, col, value]):
+            self._set(row, col, value)
+
+    def append_row(self, values, **kwargs):
+        with self.backend.call("append_row", self.title, write=True, sent=values):
+            self._trim(); self.rows.append([to_cell(v) for v in values])
+
+    def append_rows(self, values, **kwargs):
+        with self.backend.call("append_rows", self.title, write=True, sent=values):
+            self._trim(); self.rows.extend([to_cell(v) for v in r] for r in values)
+
+    def clear(self):
+        with self.backend.call("clear", self.title, write=True):
+            self.rows.clear()
+
+
+class LocalBackend(StorageBackend):
+    def __init__(self, path=None, default_tabs=None, latency=0.0, measure_bytes=False):
+        self.path = path
+        self.latency = latency
+        self.measure_bytes = measure_bytes  # payload-groottes alleen tellen als iemand ze leest (benchmarks)
+        self.lock = threading.RLock()
+        self.data = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f: self.data = json.load(f)
+        for tab, headers in (default_tabs or {}).items():
+            self.data.setdefault(tab, [list(headers)])
+        self.sheet_ids = {tab: i for i, tab in enumerate(self.data)}
+        self.revision = 0
+        self.reset_stats()
+
+    def worksheet(self, name):
+        if name not in self.data: raise KeyError(f"Werkblad '{name}' bestaat niet")
+        return LocalWorksheet(self, name, self.sheet_ids[name])
+
+    def add_worksheet(self, name, rows):
+        with self.lock:
+            self.data[name] = [[to_cell(v) for v in r] for r in rows]
+            self.sheet_ids.setdefault(name, len(self.sheet_ids))
+            self.revision += 1
+            self.save()
+
+    def save(self):
+        if not self.path: return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f: json.dump(self.data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def last_modified(self):
+        # Revisieteller als stand-in voor Drive's modifiedTime
+        with self.call("last_modified", None) as c:
+            c.received = self.revision
+            return self.revision
+
+    def call(self, method, tab, write=False, sent=None):
+        return _LocalCall(self, method, write, sent)
+
+    # --- METINGEN (voor benchmarks en load-tests) ---
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {'requests': 0, 'reads': 0, 'writes': 0, 'bytes_sent': 0, 'bytes_received': 0, 'methods': {}}
+
+    def get_stats(self):
+        with self.lock:
+            return {**self.stats, 'methods': dict(self.stats['methods'])}
+
+    # Zelfde vorm als Spreadsheet.values_batch_get; alleen hele tabbladen ('Naam') worden gebruikt
+    def values_batch_get(self, ranges):
+        with self.call("values_batch_get", None, sent=ranges) as c:
+            out = []
+            for label in ranges:
+                name = label.strip("'").replace("''", "'")
+                out.append({'range': label, 'majorDimension': 'ROWS', 'values': [list(r) for r in self.data.get(name, [])]})
+            c.received = out
+            return {'valueRanges': out}
+
+    # Zelfde vorm als Spreadsheet.batch_update; alleen deleteDimension op rijen wordt gebruikt
+    def batch_update(self, body):
+        with self.call("spreadsheet.batch_update", None, write=True, sent=body):
+            by_id = {i: t for t, i in self.sheet_ids.items()}
+            for req in body.get("requests", []):
+                rng = req["deleteDimension"]["range"]
+                del self.data[by_id[rng["sheetId"]]][rng["startIndex"]:rng["endIndex"]]
+
+
+class _LocalCall:
+    # Eén "API-call": lock vasthouden, optioneel netwerkvertraging nabootsen,
+    # payload-groottes tellen (als measure_bytes aan staat) en na writes opslaan
+    def __init__(self, backend, method, write, sent):
+        self.backend, self.method, self.write = backend, method, write
+        self.sent, self.received = sent, None
+
+    def __enter__(self):
+        self.backend.lock.acquire()
+        if self.backend.latency: time.sleep(self.backend.latency)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            st = self.backend.stats
+            st['requests'] += 1
+            st['writes' if self.write else 'reads'] += 1
+            st['methods'][self.method] = st['methods'].get(self.method, 0) + 1
+            if self.backend.measure_bytes:
+                if self.sent is not None: st['bytes_sent'] += payload_size(self.sent)
+                if self.received is not None: st['bytes_received'] += payload_size(self.received)
+            if self.write and exc_type is None:
+                self.backend.revision += 1
+                self.backend.save()
+        finally: self.backend.lock.release()
+
+
+def payload_size(obj):
+    return len(json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+# Eén gedeelde LocalBackend per pad, zodat benchmarks dezelfde instantie zien als de app
+LOCAL_BACKENDS = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def open_local_backend(path=None, default_tabs=None, latency=0.0):
+    with _REGISTRY_LOCK:
+        key = path or ":memory:"
+        if key not in LOCAL_BACKENDS: LOCAL_BACKENDS[key] = LocalBackend(path, default_tabs=default_tabs, latency=latency)
+        return LOCAL_BACKENDS[key]
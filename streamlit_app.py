@@ -1,11 +1,26 @@
+import time
+SCRIPT_START = time.perf_counter()  # laadtijd per scherm (zie startup.py)
 import streamlit as st
+import os
 import uuid
 import json
-import time
-import pandas as pd
-import gspread
-from google.oauth2.service_account import Credentials
-from datetime import date, datetime
+import threading
+from collections import deque
+from datetime import date, datetime, timedelta
+from sqlite_mirror import SheetMirror
+from storage import SheetsBackend, open_local_backend, records_from_values, rowcol_to_a1, tab_range
+from instrumentation import ApiRecorder, InstrumentedWorksheet, call_api
+from scheduler import RequestScheduler, is_stale_handle
+from search_index import SearchIndex
+from lead_store import Lead, LeadStore
+from write_queue import WriteBehindQueue, rebase_op
+from startup import IMPORT_TIMES, LazyModule, StartupLog
+
+# Zware modules pas bij het eerste gebruik laden: het loginscherm en de pagina's zonder
+# tabellen/grafieken betalen er dan niet voor. gspread/google-auth: zie make_google_client,
+# streamlit_calendar: zie de Uren-pagina.
+pd = LazyModule("pandas")
+exports = LazyModule("exports")
 
 # --- 1. CONFIGURATIE ---
 st.set_page_config(
@@ -15,11 +30,15 @@ st.set_page_config(
     initial_sidebar_state="expanded" 
 )
 
-# --- KALENDER IMPORT ---
-try:
-    from streamlit_calendar import calendar
-except ImportError:
-    st.error("⚠️ Plugin mist. Voeg 'streamlit-calendar' toe aan requirements.txt")
+# Laadtijden per scherm, gedeeld over sessies (getoond in het 🐞 debug paneel)
+@st.cache_resource
+def get_startup_log():
+    return StartupLog()
+
+COLD_RUN = get_startup_log().begin()
+
+def record_screen_time(screen):
+    get_startup_log().record(screen, time.perf_counter() - SCRIPT_START, cold=COLD_RUN)
 
 # ==========================================
 # 🔐 BEVEILIGING
@@ -43,6 +62,7 @@ def check_password():
     return False
 
 if not check_password():
+    record_screen_time("Login")
     st.stop()
 
 # --- CONSTANTEN ---
@@ -50,114 +70,57 @@ TASK_CATEGORIES = ["Website Bouw", "Content", "Administratie", "Meeting", "Overi
 HOURLY_RATE = 30.0
 THEME_COLOR = "#ff6b6b"
 INSPIRATION_TAGS = ["Algemeen", "Hovenier", "Aannemer", "E-commerce", "Portfolio", "Zakelijke Dienstverlening", "Horeca", "Anders"]
+PIPELINE_HEADERS = ['Status', 'Bedrijf', 'Prijs', 'Contact', 'Email', 'Telefoon', 'Website', 'Projectmap', 'Notities', 'Onderhoud', 'ID']
+TASK_HEADERS = ['Status', 'Klant', 'Taak', 'Categorie', 'Deadline', 'Prioriteit', 'Notities', 'ID']
+HOUR_HEADERS = ['Datum', 'Klant', 'Uren', 'Omschrijving', 'Tarief', 'Totaal', 'ID']
+INSPIRATION_HEADERS = ['Naam', 'URL', 'Notitie', 'Tag', 'ID']
+TAB_HEADERS = {'Sheet1': PIPELINE_HEADERS, 'Taken': TASK_HEADERS, 'Uren': HOUR_HEADERS, 'Inspiratie': INSPIRATION_HEADERS}
+PIPELINE_STATUS = {'col1': 'Te benaderen', 'col2': 'Opgevolgd', 'col3': 'Geen interesse', 'col4': 'Geland 🎉', 'trash': 'Prullenbak 🗑️'}
+
+# Instellingen: eerst st.secrets, daarna omgevingsvariabele (bv. CRM_PIPELINE_WRITE_MODE)
+def get_setting(name, default=None):
+    try:
+        if name in st.secrets: return st.secrets[name]
+    except Exception: pass
+    return os.environ.get(f"CRM_{name.upper()}", default)
+
+# Pipeline: aantal kaarten per kolom per "Meer laden" stap, en hoeveel kaart-HTML we cachen
+KANBAN_PAGE_SIZE = int(get_setting("kanban_page_size", 25))
+CARD_CACHE_SIZE = 20000
+
+# Gecachte tabbladen: na DATA_TTL controleren of ze gewijzigd zijn, na DATA_MAX_AGE altijd opnieuw
+DATA_TTL = 600
+DATA_MAX_AGE = 3600
+
+# Kalender: dagen rond de zichtbare maand die we ook meesturen; urenlijst: regels per pagina
+CALENDAR_MARGIN = timedelta(days=14)
+HOUR_PAGE_SIZE = int(get_setting("hour_page_size", 50))
+
+# "diff" = alleen gewijzigde rijen schrijven, "full" = tabblad legen en volledig herschrijven
+PIPELINE_WRITE_MODE = str(get_setting("pipeline_write_mode", "diff")).lower()
 
 # --- 2. CSS STYLING (PERFECTE 100px HOVER-SIDEBAR) ---
-st.markdown(f"""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Dela+Gothic+One&family=Montserrat:wght@400;500;600;700&display=swap');
-    
-    /* Algemene Fonts */
-    .stApp, p, input, textarea, .stMarkdown, .stSelectbox, .stTextInput, .stDateInput, .stNumberInput {{ 
-        font-family: 'Montserrat', sans-serif !important; 
-    }}
-    button, i, span[class^="material-symbols"] {{ font-family: inherit !important; }}
-    h1, h2, h3, .stHeading, .st-emotion-cache-10trblm {{
-        font-family: 'Dela Gothic One', cursive !important;
-        letter-spacing: 1px;
-        font-weight: 400 !important;
-    }}
-    .stApp {{ background-color: #0E1117; }}
-
-    /* =========================================
-       🚀 DE NIEUWE HOVER-SIDEBAR MAGIE 3.0
-       ========================================= */
-       
-    /* 1. Verberg standaard knoppen */
-    [data-testid="stSidebarCollapseButton"], [data-testid="stSidebarResizer"] {{ display: none !important; }}
-
-    /* 2. De Sidebar Container (Standaard 100px) */
-    [data-testid="stSidebar"] {{
-        position: fixed !important; left: 0; top: 0; height: 100vh !important;
-        width: 100px !important; min-width: 100px !important; max-width: 260px !important;
-        background-color: #151922 !important; border-right: 1px solid #2b313e !important;
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1) !important;
-        overflow-x: hidden !important; z-index: 999999 !important;
-    }}
-
-    /* Uitklappen bij hover */
-    [data-testid="stSidebar"]:hover {{ width: 260px !important; min-width: 260px !important; }}
-    [data-testid="stSidebar"]::-webkit-scrollbar {{ display: none; }}
-
-    /* Main content netjes opschuiven zodat het naast de 100px balk past */
-    .block-container {{ padding-left: 130px !important; padding-top: 2rem !important; max-width: 100% !important; }}
-
-    /* 3. Logo Styling - Links uitgelijnd met 24px padding zodat het matcht met knoppen */
-    [data-testid="stSidebar"] [data-testid="stImage"] {{
-        display: flex; justify-content: flex-start; padding-left: opx; margin-top: 10px;;
-        transition: all 0.3s ease;
-    }}
-
-    /* 4. KNOPPEN STYLING */
-    [data-testid="stSidebar"] .stButton > button {{
-        width: 100% !important; border: none !important;
-        display: flex !important; flex-direction: row !important;
-        justify-content: flex-start !important; align-items: center !important;
-        padding: 12px 24px !important; /* Perfect uitgelijnd met logo */
-        white-space: nowrap !important;
-        overflow: hidden !important;
-        transition: all 0.3s ease !important;
-    }}
-
-    /* Als de sidebar NIET gehoverd is (100px) -> Verberg tekst */
-    [data-testid="stSidebar"]:not(:hover) .stButton > button {{
-        max-width: 75px !important; /* Dwingt de tekst eraf, houdt alleen ruimte voor padding + icoon */
-        padding-right: 0 !important;
-    }}
-    
-    /* Als de sidebar WEL gehoverd is */
-    [data-testid="stSidebar"]:hover .stButton > button {{
-         max-width: 240px !important;
-    }}
-
-    [data-testid="stSidebar"] .stButton > button p {{
-        font-size: 1.1em !important; margin: 0 !important; font-weight: 500 !important;
-    }}
-
-    /* Niet-actieve knoppen */
-    [data-testid="stSidebar"] .stButton > button[kind="secondary"] {{
-        background-color: transparent !important; color: #8b92a5 !important;
-    }}
-    [data-testid="stSidebar"] .stButton > button[kind="secondary"]:hover {{
-        background-color: #2b313e !important; color: white !important;
-    }}
-
-    /* Actieve knop */
-    [data-testid="stSidebar"] .stButton > button[kind="primary"] {{
-        background-color: #2b313e !important; color: white !important;
-        border-left: 4px solid {THEME_COLOR} !important; border-radius: 0 8px 8px 0 !important;
-        padding-left: 20px !important; /* compenseert voor de 4px border */
-    }}
-
-    /* OVERIGE STYLING */
-    div[data-testid="metric-container"] {{
-        background-color: #25262b; border: 1px solid #333; padding: 20px; border-radius: 10px; color: white;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1); margin-bottom: 10px;
-    }}
-    .inspi-card {{
-        background-color: #25262b; border: 1px solid #333; border-left: 4px solid {THEME_COLOR};
-        padding: 15px; border-radius: 8px; margin-bottom: 10px;
-    }}
-    @media (max-width: 768px) {{
-        .block-container {{ padding-left: 110px !important; padding-top: 1rem !important; }}
-        h1 {{ font-size: 1.8rem !important; }}
-    }}
-    </style>
-""", unsafe_allow_html=True)
+# De opmaak staat in static/crm.css. Met static serving aan (.streamlit/config.toml) gaat er
+# per rerun alleen een <link> mee en haalt de browser het bestand één keer op; anders sturen
+# we de inhoud inline mee (één keer per proces van schijf gelezen).
+CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "crm.css")
 
-# --- 3. GOOGLE SHEETS VERBINDING (GECACHE) ---
 @st.cache_resource
-def get_google_client():
+def load_css():
+    with open(CSS_PATH, encoding="utf-8") as f: return f.read(), int(os.path.getmtime(CSS_PATH))
+
+try: static_serving = st.get_option("server.enableStaticServing")
+except Exception: static_serving = False
+css, css_version = load_css()
+if static_serving: st.markdown(f'<link rel="stylesheet" href="app/static/crm.css?v={css_version}">', unsafe_allow_html=True)
+else: st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
+
+# --- 3. GOOGLE SHEETS VERBINDING (GECACHE) ---
+def make_google_client():
     try:
+        # Pas hier importeren: zonder Sheets-backend (of vóór het inloggen) niet nodig
+        import gspread
+        from google.oauth2.service_account import Credentials
         json_text = st.secrets["service_account"]
         creds_dict = json.loads(json_text, strict=False)
         scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
@@ -167,30 +130,448 @@ def get_google_client():
     except Exception as e:
         return None
 
+@st.cache_resource
+def get_google_client():
+    return make_google_client()
+
+# Backend kiezen met de setting storage_backend: "sheets" (standaard) of "local"
+# (JSON-bestand uit local_store_path, of alleen in het geheugen met ":memory:")
+@st.cache_resource
+def get_storage_backend():
+    if str(get_setting("storage_backend", "sheets")).lower() == "local":
+        path = get_setting("local_store_path", "crm_local.json")
+        return open_local_backend(None if path == ":memory:" else path, default_tabs=TAB_HEADERS, latency=float(get_setting("local_latency", 0)))
+    if not get_google_client(): return None
+    # Op key openen (setting spreadsheet_key) scheelt een zoekactie in Drive; titel als terugval
+    api_call = lambda method, fn, *args: call_api(get_api_recorder(), get_scheduler(), None, method, fn, *args)
+    return SheetsBackend(make_google_client, get_setting("spreadsheet_title", "MijnSalesCRM"), key=get_setting("spreadsheet_key"), api_call=api_call)
+
+# Alle Sheets calls lopen via een geïnstrumenteerd werkblad (zie het 🐞 debug paneel)
+@st.cache_resource
+def get_api_recorder():
+    return ApiRecorder()
+
+# Quotum per minuut (Sheets API: 60 lezen / 60 schrijven per gebruiker); 0 = onbeperkt.
+# De lokale backend heeft standaard geen quotum.
+@st.cache_resource
+def get_scheduler():
+    default = 0 if str(get_setting("storage_backend", "sheets")).lower() == "local" else 60
+    return RequestScheduler(
+        read_per_minute=float(get_setting("read_quota", default)), write_per_minute=float(get_setting("write_quota", default)),
+        burst=int(get_setting("quota_burst", 0)) or None, retry_ctx=get_api_recorder().retry, on_error=drop_stale_handles,
+    )
+
+def drop_stale_handles(exc):
+    # 401/404: spreadsheet en werkbladen bij de volgende call opnieuw openen (met een vers token)
+    if not is_stale_handle(exc): return
+    backend = get_storage_backend()
+    if backend: backend.invalidate()
+
+def open_sheet(sheet_name="Sheet1"):
+    # Handles zijn gecachet in de backend; alleen echt openen telt als API-call.
+    # Netwerk-, quotum- en serverfouten gaan door (de write-behind probeert het dan opnieuw);
+    # alleen een tabblad dat echt niet bestaat is een blijvende fout.
+    backend = get_storage_backend()
+    if not backend: raise RuntimeError("Geen opslag beschikbaar")
+    try: ws = backend.worksheet(sheet_name)
+    except KeyError as e: raise RuntimeError(f"Tabblad '{sheet_name}' niet gevonden") from e
+    return InstrumentedWorksheet(ws, get_api_recorder(), sheet_name, get_scheduler())
+
 def get_sheet(sheet_name="Sheet1"):
-    client = get_google_client()
-    if client:
-        try: return client.open("MijnSalesCRM").worksheet(sheet_name)
-        except: return None
-    return None
+    try: return open_sheet(sheet_name)
+    except Exception: return None
+
+# Versie per tabblad (gedeeld over alle sessies); een write verhoogt alleen de eigen versie
+@st.cache_resource
+def get_tab_versions():
+    return {'lock': threading.Lock(), 'versions': {}}
 
-def clear_data_cache():
-    st.cache_data.clear()
+def get_tab_version(sheet_name):
+    return get_tab_versions()['versions'].get(sheet_name, 0)
 
-@st.cache_data(ttl=600) 
-def get_all_records_cached(sheet_name):
+def bump_tab_version(sheet_name):
+    tv = get_tab_versions()
+    with tv['lock']: tv['versions'][sheet_name] = tv['versions'].get(sheet_name, 0) + 1
+
+def clear_data_cache(sheet_name):
+    bump_tab_version(sheet_name)
+    mirror = get_mirror()
+    if mirror: mirror.mark_dirty(sheet_name)
+
+# Harde bovengrens; normaal bepaalt de wijzigingsdetectie hieronder wanneer we opnieuw ophalen
+@st.cache_data(ttl=DATA_MAX_AGE, max_entries=64) 
+def fetch_records_cached(sheet_name, version):
     sheet = get_sheet(sheet_name)
     if not sheet: return []
-    try: return sheet.get_all_records()
-    except: time.sleep(1); return sheet.get_all_records()
+    stamp = spreadsheet_stamp()
+    records = sheet.get_all_records()
+    note_fetch(sheet_name, stamp)
+    return records
+
+# --- WIJZIGINGSDETECTIE ---
+# Na DATA_TTL vergelijken we eerst de wijzigingsstempel van de spreadsheet (Drive
+# modifiedTime; lokaal een revisieteller) met die van vóór de laatste download.
+# Gelijk: gecachte records nog een TTL houden. Anders of onbekend: opnieuw ophalen.
+# De stempel geldt voor de hele spreadsheet, dus na eigen writes halen we wel opnieuw op.
+@st.cache_resource
+def get_change_tracker():
+    return {'lock': threading.Lock(), 'stamp': None, 'checked_at': 0.0, 'tabs': {}, 'loads': {}, 'skipped': 0, 'refetched': 0}
+
+def spreadsheet_stamp(max_age=5):
+    # Eén Drive-call per paar seconden, gedeeld door alle tabbladen en sessies
+    ct = get_change_tracker()
+    with ct['lock']:
+        if time.time() - ct['checked_at'] <= max_age: return ct['stamp']
+    backend = get_storage_backend()
+    try: stamp = call_api(get_api_recorder(), None, None, 'last_modified', backend.last_modified) if backend else None
+    except Exception: stamp = None
+    with ct['lock']: ct['stamp'], ct['checked_at'] = stamp, time.time()
+    return stamp
+
+def note_fetch(sheet_name, stamp, source='sheet'):
+    ct = get_change_tracker()
+    with ct['lock']:
+        ct['tabs'][sheet_name] = {'stamp': stamp, 'at': time.time(), 'source': source}
+        ct['loads'][sheet_name] = ct['loads'].get(sheet_name, 0) + 1
+
+def check_tab_changes(tabs, force=False):
+    ct, now = get_change_tracker(), time.time()
+    with ct['lock']: due = {t: dict(ct['tabs'][t]) for t in tabs if t in ct['tabs'] and (force or now - ct['tabs'][t]['at'] > DATA_TTL)}
+    if not due: return []
+    stamp = spreadsheet_stamp(0 if force else 5)
+    changed = []
+    for t, entry in due.items():
+        with ct['lock']:
+            unchanged = stamp is not None and entry['stamp'] == stamp
+            if unchanged: ct['tabs'][t]['at'] = now; ct['skipped'] += 1
+            else: ct['tabs'].pop(t, None); ct['refetched'] += 1
+        if unchanged: continue
+        changed.append(t)
+        # Ook als de records uit de spiegel kwamen: die is dan net zo oud, dus vuil markeren
+        drop_working_copy(t)
+        clear_data_cache(t)
+    return changed
+
+# --- GEBUNDELD OPHALEN (ALLE TABBLADEN IN ÉÉN REQUEST) ---
+# Bij een nieuwe sessie en bij 🔄 halen we alle koude tabbladen op met één values_batch_get
+# en vullen daarmee de gedeelde werkkopieën (de enige weg naar records) en de spiegel.
+def prefetch_tabs(tabs=None, force=False):
+    mirror, ct = get_mirror(), get_change_tracker()
+    tabs = tabs or MIRRORED_TABS
+    if not force:
+        # Koud = nog nooit opgehaald in dit proces, of gewijzigd volgens de wijzigingsdetectie
+        check_tab_changes(tabs)
+        with ct['lock']: known = set(ct['tabs'])
+        tabs = [t for t in tabs if t not in known and not (mirror and mirror.is_fresh(t))]
+    backend = get_storage_backend()
+    if not tabs or not backend: return
+    gens = {t: mirror.generation.get(t, 0) for t in tabs} if mirror else {}
+    stamp = spreadsheet_stamp()
+    try: resp = call_api(get_api_recorder(), get_scheduler(), None, 'values_batch_get', backend.values_batch_get, [tab_range(t) for t in tabs])
+    except Exception: return  # dan haalt elke pagina zijn eigen tabblad op
+    for tab, vr in zip(tabs, resp.get('valueRanges', [])):
+        records = records_from_values(vr.get('values', []))
+        note_fetch(tab, stamp)
+        set_working_copy(tab, records)
+        if mirror and records: mirror.replace_tab(tab, records, generation=gens[tab])
+
+def get_all_records_cached(sheet_name):
+    check_tab_changes([sheet_name])
+    copy = working_copy(sheet_name)
+    if copy is not None: return apply_pending_writes(sheet_name, copy)
+    # Met spiegel: lokaal lezen zolang het tabblad niet net door ons is gewijzigd
+    mirror = get_mirror()
+    if mirror and mirror.is_fresh(sheet_name):
+        records = mirror.get_records(sheet_name)
+        note_fetch(sheet_name, None, source='mirror')
+    else:
+        gen = mirror.generation.get(sheet_name, 0) if mirror else None
+        records = fetch_records_cached(sheet_name, get_tab_version(sheet_name))
+        if mirror and records: mirror.replace_tab(sheet_name, records, generation=gen)
+    set_working_copy(sheet_name, records)
+    return apply_pending_writes(sheet_name, records)
+
+def query_records(sheet_name, **where):
+    # Filter (bv. Klant=...) over dezelfde records als de rest van de pagina (werkkopie,
+    # anders spiegel of Sheet), zodat een gefilterde lijst nooit een andere versie toont
+    return [r for r in get_all_records_cached(sheet_name) if all(r.get(k) == v for k, v in where.items())]
+
+# ID -> rijnummer, opgebouwd uit dezelfde gecachte records (en dus samen ververst)
+@st.cache_data(ttl=600)
+def build_row_index_cached(sheet_name, version):
+    records = fetch_records_cached(sheet_name, version)
+    return {str(record_id(r)): i + 2 for i, r in enumerate(records) if record_id(r)}
+
+def get_row_number(sheet_name, record_id):
+    pos = working_copy_positions(sheet_name)
+    if pos is not None: return pos.get(str(record_id))
+    mirror = get_mirror()
+    if mirror and mirror.is_fresh(sheet_name): return mirror.row_number(sheet_name, 'ID', str(record_id))
+    return build_row_index_cached(sheet_name, get_tab_version(sheet_name)).get(str(record_id))
+
+# --- GEDEELDE STORE: WERKKOPIEËN VAN ALLE TABBLADEN ---
+# Eén kopie per tabblad voor het hele proces (alle sessies). Na een geslaagde write passen
+# we de kopie aan in plaats van het tabblad opnieuw te downloaden. Opnieuw ophalen gebeurt
+# pas bij 🔄, na de TTL of als de Sheet afwijkt. De tabbladversie gaat wel omhoog, zodat
+# afgeleide caches (rollups, exports) meegaan.
+# Elke wijziging van een kopie verhoogt de storeversie van dat tabblad en komt in een kort
+# logboek met de sessie die hem deed. Zo ziet een sessie bij de volgende rerun of een
+# ander iets heeft veranderd, en hoeft ze alleen dát tabblad opnieuw in te lezen.
+WORKING_COPY_TABS = ["Sheet1", "Taken", "Uren", "Inspiratie"]
+WORKING_COPY_TTL = DATA_MAX_AGE
+STORE_LOG_SIZE = 200
+
+@st.cache_resource
+def get_working_copies():
+    return {'lock': threading.Lock(), 'tabs': {}, 'versions': {}, 'log': {}}
+
+def bump_store_version(wc, sheet_name, origin=None):
+    # Aanroepen met wc['lock'] vast; origin = session_id van de schrijver (None = de Sheet zelf)
+    v = wc['versions'][sheet_name] = wc['versions'].get(sheet_name, 0) + 1
+    wc['log'].setdefault(sheet_name, deque(maxlen=STORE_LOG_SIZE)).append((v, origin))
+
+def store_version(sheet_name):
+    return get_working_copies()['versions'].get(sheet_name, 0)
+
+def store_changes(sheet_name, since, origin):
+    # -> (door anderen gewijzigd sinds versie `since`?, huidige versie)
+    wc = get_working_copies()
+    with wc['lock']:
+        current = wc['versions'].get(sheet_name, 0)
+        if since == current: return False, current
+        log = wc['log'].get(sheet_name) or ()
+        # Onbekend, ouder dan het logboek of na een herstart van de store: als gewijzigd behandelen
+        if since is None or since > current or not log or log[0][0] > since + 1: return True, current
+        return any(v > since and o != origin for v, o in log), current
+
+def working_copy(sheet_name):
+    wc = get_working_copies()
+    with wc['lock']:
+        entry = wc['tabs'].get(sheet_name)
+        if not entry or time.time() - entry['fetched_at'] > WORKING_COPY_TTL: return None
+        return list(entry['records'])
+
+def working_copy_positions(sheet_name):
+    # ID -> rijnummer; de kopie staat in Sheet-volgorde, dus rij = positie + 2
+    wc = get_working_copies()
+    with wc['lock']:
+        entry = wc['tabs'].get(sheet_name)
+        if not entry or time.time() - entry['fetched_at'] > WORKING_COPY_TTL: return None
+        if entry['pos'] is None:
+            entry['pos'] = {}
+            for i, r in enumerate(entry['records']):
+                if record_id(r): entry['pos'].setdefault(str(record_id(r)), i + 2)
+        return entry['pos']
+
+def set_working_copy(sheet_name, records, origin=None):
+    if sheet_name not in WORKING_COPY_TABS: return
+    wc = get_working_copies()
+    with wc['lock']:
+        wc['tabs'][sheet_name] = {'records': records, 'fetched_at': time.time(), 'pos': None}
+        bump_store_version(wc, sheet_name, origin)
+        version = wc['versions'][sheet_name]
+    index_tab(sheet_name, records, version)
+
+def drop_working_copy(sheet_name=None):
+    wc = get_working_copies()
+    with wc['lock']:
+        for t in (WORKING_COPY_TABS if sheet_name is None else [sheet_name]):
+            wc['tabs'].pop(t, None)
+            bump_store_version(wc, t)
+
+def patch_working_copy(sheet_name, ops, rows):
+    # rows: ID -> rijnummer zoals de Sheet ze gaf. Wijkt dat af van de kopie, dan kopie weg.
+    pos = working_copy_positions(sheet_name)
+    if pos is None: return
+    if any(rows.get(op['id']) != pos.get(str(op['id'])) for op in ops):
+        drop_working_copy(sheet_name); return
+    origins = {op.get('origin') for op in ops}
+    wc = get_working_copies()
+    with wc['lock']:
+        entry = wc['tabs'].get(sheet_name)
+        if not entry: return
+        entry.update(records=apply_ops(sheet_name, entry['records'], ops), pos=None)
+        bump_store_version(wc, sheet_name, origins.pop() if len(origins) == 1 else None)
+        records, version = entry['records'], wc['versions'][sheet_name]
+    index_records(sheet_name, records, [op['id'] for op in ops], version)
+
+# --- LOKALE SQLITE SPIEGEL (OPTIONEEL) ---
+# Aan met de setting sqlite_mirror_path; een achtergrondthread houdt hem gelijk met de Sheet.
+# Gelezen als er (nog) geen werkkopie is, bv. na een herstart; daarna is de werkkopie de bron.
+MIRRORED_TABS = ["Sheet1", "Taken", "Uren", "Inspiratie"]
+
+def fetch_records_direct(sheet_name):
+    sheet = get_sheet(sheet_name)
+    return sheet.get_all_records() if sheet else None
+
+@st.cache_resource
+def get_mirror():
+    path = get_setting("sqlite_mirror_path")
+    if not path: return None
+    mirror = SheetMirror(path)
+    # Alleen tabbladen ophalen die sinds de vorige ronde (volgens de wijzigingsstempel) zijn veranderd
+    mirror.start_sync(MIRRORED_TABS, fetch_records_direct, interval=float(get_setting("mirror_sync_interval", 60)), stamp=spreadsheet_stamp)
+    return mirror
+
+# --- SCHRIJVEN (WRITE-BEHIND) ---
+# Alle mutaties gaan als ops (upsert / cells / delete per ID) via submit_writes.
+# Met write_behind aan (standaard) schrijft een achtergrondthread ze gebundeld weg.
+def record_id(r):
+    return r.get('ID') or r.get('id') or r.get('ID ')
+
+def row_range(row_nr, n_cols, first_col=1):
+    return f"{rowcol_to_a1(row_nr, first_col)}:{rowcol_to_a1(row_nr, first_col + n_cols - 1)}"
+
+def delete_sheet_rows(sheet, row_numbers):
+    # Eén batch-request; van onder naar boven zodat de rijnummers kloppen
+    reqs = [{"deleteDimension": {"range": {"sheetId": sheet.id, "dimension": "ROWS", "startIndex": r - 1, "endIndex": r}}} for r in sorted(row_numbers, reverse=True)]
+    if reqs: sheet.spreadsheet.batch_update({"requests": reqs})
+
+def cell_ranges(row_nr, cells):
+    # Aaneengesloten kolommen samen in één range (bv. Klant t/m Notities = B:G)
+    out, cols = [], sorted(cells)
+    while cols:
+        start = cols.pop(0); vals = [cells[start]]
+        while cols and cols[0] == start + len(vals): vals.append(cells[cols.pop(0)])
+        out.append({'range': row_range(row_nr, len(vals), start), 'values': [vals]})
+    return out
+
+def locate_rows(sheet, sheet_name, ops, id_col):
+    # Rijnummers uit de index, gecontroleerd met één batch_get van de ID-cellen.
+    # Klopt er iets niet, dan één keer de hele ID-kolom lezen.
+    # Ops met een 'base' lezen in dezelfde batch_get de hele rij -> (rijnummers, huidige rijen)
+    # Na een mislukte write (misschien toch aangekomen) altijd opzoeken: een al toegevoegde rij
+    # wordt dan een update en een delete raakt nooit een verschoven rij.
+    found, current = {}, {}
+    width = len(TAB_HEADERS[sheet_name])
+    based = {op['id'] for op in ops if op.get('base')}
+    full_row = lambda val: (list(val[0]) if val and val[0] else []) + [''] * width
+    for op in ops:
+        r = op.get('row_hint') or get_row_number(sheet_name, op['id'])
+        if r: found[op['id']] = r
+    needs_lookup = any(op.get('recheck') or ((op['kind'] != 'upsert' or op['id'] in based) and op['id'] not in found) for op in ops)
+    if found and not needs_lookup:
+        cells = sheet.batch_get([row_range(r, width) if oid in based else rowcol_to_a1(r, id_col) for oid, r in found.items()])
+        expect = {op['id']: op.get('match', op['id']) for op in ops}
+        for (oid, r), val in zip(list(found.items()), cells):
+            row = full_row(val)
+            if oid in based: current[oid] = row
+            cur = row[id_col - 1 if oid in based else 0]
+            if str(cur) != str(expect[oid]): needs_lookup = True; break
+    if needs_lookup:
+        col = sheet.col_values(id_col)
+        pos = {}
+        for i, v in enumerate(col[1:]): pos.setdefault(str(v), i + 2)
+        found = {op['id']: pos[str(op['id'])] for op in ops if str(op['id']) in pos}
+        rows = [(oid, found[oid]) for oid in based if oid in found]
+        vals = sheet.batch_get([row_range(r, width) for _, r in rows]) if rows else []
+        current = {oid: full_row(v) for (oid, _), v in zip(rows, vals)}
+    return found, current
+
+# Rebases bij gelijktijdige writes, gedeeld over sessies (getoond in de sidebar en het debugpaneel)
+@st.cache_resource
+def get_conflict_log():
+    return {'lock': threading.Lock(), 'seq': 0, 'rebased': 0, 'skipped': 0, 'entries': deque(maxlen=50)}
+
+def note_rebase(sheet_name, op, new_op, conflicts):
+    cl = get_conflict_log()
+    with cl['lock']:
+        cl['seq'] += 1
+        cl['rebased' if new_op else 'skipped'] += 1
+        cl['entries'].append({'seq': cl['seq'], 'at': time.time(), 'tab': sheet_name, 'id': op['id'], 'kind': op['kind'], 'origin': op.get('origin'),
+                              'skipped': new_op is None, 'conflicts': [TAB_HEADERS[sheet_name][c - 1] for c in conflicts if c <= len(TAB_HEADERS[sheet_name])]})
+
+def flush_write_ops(ops):
+    by_tab = {}
+    for op in ops: by_tab.setdefault(op['tab'], []).append(op)
+    for sheet_name, tab_ops in by_tab.items():
+        sheet = open_sheet(sheet_name)
+        rows, current = locate_rows(sheet, sheet_name, tab_ops, TAB_HEADERS[sheet_name].index('ID') + 1)
+        # Optimistische concurrency: ops met een base op de huidige rij rebasen
+        rebased, kept = False, []
+        for op in tab_ops:
+            new_op, conflicts = rebase_op(op, current.get(op['id']) if op['id'] in rows else None)
+            if new_op is not op: rebased = True; note_rebase(sheet_name, op, new_op, conflicts)
+            if new_op: kept.append(new_op)
+        # Gerebased = de schrijvende sessie moet ook de velden van anderen zien -> geen eigen origin
+        if rebased: tab_ops = [dict(op, origin=None) for op in kept]
+        updates, appends, deletes = [], [], []
+        for op in tab_ops:
+            r = rows.get(op['id'])
+            if op['kind'] == 'delete':
+                if r: deletes.append(r)
+            elif op['kind'] == 'cells':
+                if r: updates.extend(cell_ranges(r, op['cells']))
+            elif r: updates.append({'range': row_range(r, len(op['row'])), 'values': [op['row']]})
+            else: appends.append(op['row'])
+        try:
+            if updates: sheet.batch_update(updates)
+            if appends: sheet.append_rows(appends)
+            if deletes: delete_sheet_rows(sheet, deletes)
+        except Exception:
+            # Onbekend wat er is aangekomen (ook van eerdere tabbladen in deze batch)
+            for op in ops: op['recheck'] = True
+            drop_working_copy(sheet_name); raise
+        patch_working_copy(sheet_name, tab_ops, rows)
+        clear_data_cache(sheet_name)
+
+@st.cache_resource
+def get_write_queue():
+    if str(get_setting("write_behind", "true")).lower() not in ("1", "true", "yes", "on"): return None
+    return WriteBehindQueue(flush_write_ops, min_interval=float(get_setting("write_min_interval", 1.0)))
+
+def submit_writes(ops):
+    if not ops: return
+    # Welke sessie schreef dit; andere sessies zien dan dat de gedeelde kopie is veranderd
+    for op in ops: op.setdefault('origin', st.session_state.get('session_id'))
+    q = get_write_queue()
+    if q: q.submit(ops)
+    else: flush_write_ops(ops)
+    index_ops(ops)
+
+def flush_pending_writes(timeout=30):
+    q = get_write_queue()
+    return q.wait_idle(timeout) if q else True
+
+def pending_writes(sheet_name):
+    q = get_write_queue()
+    return q.pending_ops(sheet_name) if q else []
+
+def apply_pending_writes(sheet_name, records):
+    # Nog niet weggeschreven mutaties over de gelezen records leggen (read-your-writes)
+    ops = pending_writes(sheet_name)
+    return apply_ops(sheet_name, records, ops) if ops else records
+
+def apply_ops(sheet_name, records, ops):
+    headers = TAB_HEADERS[sheet_name]
+    out = [dict(r) for r in records]
+    pos = {}
+    for i, r in enumerate(out):
+        if record_id(r): pos.setdefault(str(record_id(r)), i)
+    removed = set()
+    for op in ops:
+        i = pos.get(str(op['id']))
+        if op['kind'] == 'delete':
+            if i is not None: removed.add(i)
+        elif op['kind'] == 'cells':
+            if i is not None:
+                for c, v in op['cells'].items(): out[i][headers[c - 1]] = v
+        elif i is not None: out[i].update(zip(headers, op['row']))
+        else:
+            pos[str(op['id'])] = len(out); out.append(dict(zip(headers, op['row'])))
+    return [r for i, r in enumerate(out) if i not in removed]
 
 # --- PIPELINE LOGICA ---
+def lead_to_row(col_key, lead):
+    m_val = "TRUE" if lead.get('maintenance') else "FALSE"
+    return [PIPELINE_STATUS.get(col_key, 'Te benaderen'), lead.get('name',''), lead.get('price',''), lead.get('contact',''), lead.get('email',''), lead.get('phone',''), lead.get('website',''), lead.get('project_map',''), lead.get('notes',''), m_val, lead.get('id', str(uuid.uuid4()))]
+
 def load_pipeline_data():
     records = get_all_records_cached("Sheet1")
     if not records: return None
 
     # Jouw 4 vertrouwde bakjes + prullenbak
-    data_structure = {'col1': [], 'col2': [], 'col3': [], 'col4': [], 'trash': []}
+    data_structure = LeadStore()
     
     status_map = {
         'Te benaderen': 'col1', 'Nieuw': 'col1', 
@@ -200,81 +581,164 @@ def load_pipeline_data():
         'Prullenbak 🗑️': 'trash', 'Prullenbak': 'trash'
     }
     
-    for row in records:
+    # Snapshot van wat er in de sheet staat (ID -> rijnummer, genormaliseerde waarden, ruwe waarden).
+    # Genormaliseerd om wijzigingen te zien; ruw ('1e mail', lege Onderhoud) als base voor de rebase.
+    snapshot = {'rows': {}, 'last_row': len(records) + 1}
+    for row_idx, row in enumerate(records):
         if row.get('Bedrijf'):
             raw_id = str(row.get('ID', '')).strip()
             has_maint = str(row.get('Onderhoud', '')).upper() == 'TRUE'
-            lead = {
-                'id': raw_id if raw_id else str(uuid.uuid4()), 
-                'name': row.get('Bedrijf'), 'price': row.get('Prijs'),
-                'contact': row.get('Contact'), 'email': row.get('Email'),
-                'phone': row.get('Telefoon'), 'website': row.get('Website'),        
-                'project_map': row.get('Projectmap'), 'notes': row.get('Notities'),
-                'maintenance': has_maint
-            }
+            lead = Lead(
+                id=raw_id if raw_id else str(uuid.uuid4()), 
+                name=row.get('Bedrijf'), price=row.get('Prijs'),
+                contact=row.get('Contact'), email=row.get('Email'),
+                phone=row.get('Telefoon'), website=row.get('Website'),        
+                project_map=row.get('Projectmap'), notes=row.get('Notities'),
+                maintenance=has_maint
+            )
             col_key = status_map.get(row.get('Status', 'Te benaderen'), 'col1')
             data_structure[col_key].append(lead)
+            if snapshot and lead['id'] in snapshot['rows']: snapshot = None  # dubbele ID's -> volledig herschrijven
+            elif snapshot:
+                # Lege ID in de sheet houden we leeg, zodat de eerste save het nieuwe ID wegschrijft
+                snap_row = [str(v) for v in lead_to_row(col_key, lead)]
+                snap_row[-1] = raw_id
+                raw_row = [str('' if row.get(h) is None else row.get(h)) for h in PIPELINE_HEADERS]
+                snapshot['rows'][lead['id']] = (row_idx + 2, snap_row, raw_row)
+    st.session_state['pipeline_snapshot'] = snapshot
     return data_structure
 
+def diff_pipeline_rows(leads_data, snapshot):
+    updates, appends, seen = [], [], set()
+    for col_key, items in leads_data.items():
+        for lead in items:
+            row = lead_to_row(col_key, lead)
+            seen.add(row[-1])
+            old = snapshot['rows'].get(row[-1])
+            if old is None: appends.append(row)
+            elif old[1] != [str(v) for v in row]: updates.append((old[0], row))
+    deletes = [(r, lid) for lid, (r, *_) in snapshot['rows'].items() if lid not in seen]
+    return updates, appends, deletes
+
+def pipeline_diff_ops(leads_data, snapshot):
+    # Alleen gewijzigde rijen als ops + de snapshot zoals hij na het schrijven is.
+    # De ruwe snapshotrij gaat mee als base: heeft een ander de rij intussen aangepast, dan
+    # schrijft de flush alleen onze velden (en verwijdert hij geen lead die uit de prullenbak is gehaald).
+    updates, appends, deletes = diff_pipeline_rows(leads_data, snapshot)
+    rows = dict(snapshot['rows']); last_row = snapshot['last_row']
+    ops = []
+    for r, row in updates:
+        _, snap_row, raw_row = rows[row[-1]]
+        op = {'tab': 'Sheet1', 'id': row[-1], 'kind': 'upsert', 'row': row, 'row_hint': r, 'base': dict(enumerate(raw_row, start=1))}
+        if snap_row[-1] != row[-1]: op['match'] = snap_row[-1]  # ID staat nog leeg in de sheet
+        written = [str(v) for v in row]
+        ops.append(op); rows[row[-1]] = (r, written, written)
+    for row in appends:
+        ops.append({'tab': 'Sheet1', 'id': row[-1], 'kind': 'upsert', 'row': row})
+        written = [str(v) for v in row]
+        last_row += 1; rows[row[-1]] = (last_row, written, written)
+    if deletes:
+        gone = sorted(r for r, _ in deletes)
+        ops += [{'tab': 'Sheet1', 'id': lid, 'kind': 'delete', 'row_hint': r, 'base': {1: rows[lid][2][0]}} for r, lid in deletes]
+        rows = {lid: (r - sum(1 for d in gone if d < r), *vals) for lid, (r, *vals) in rows.items() if r not in gone}
+        last_row -= len(gone)
+    return ops, {'rows': rows, 'last_row': last_row}
+
 def save_pipeline_data(leads_data):
+    snapshot = st.session_state.get('pipeline_snapshot')
+    if PIPELINE_WRITE_MODE == "diff" and snapshot:
+        ops, new_snapshot = pipeline_diff_ops(leads_data, snapshot)
+        submit_writes(ops)
+        st.session_state['pipeline_snapshot'] = new_snapshot
+        return
     sheet = get_sheet("Sheet1")
     if not sheet: return
-    rows = [['Status', 'Bedrijf', 'Prijs', 'Contact', 'Email', 'Telefoon', 'Website', 'Projectmap', 'Notities', 'Onderhoud', 'ID']]
-    
-    col_map = {
-        'col1': 'Te benaderen', 
-        'col2': 'Opgevolgd', 
-        'col3': 'Geen interesse', 
-        'col4': 'Geland 🎉', 
-        'trash': 'Prullenbak 🗑️'
-    }
-    
+    rows = [PIPELINE_HEADERS]
     for col_key, items in leads_data.items():
-        st_txt = col_map.get(col_key, 'Te benaderen')
-        for i in items:
-            m_val = "TRUE" if i.get('maintenance') else "FALSE"
-            rows.append([st_txt, i.get('name',''), i.get('price',''), i.get('contact',''), i.get('email',''), i.get('phone',''), i.get('website',''), i.get('project_map',''), i.get('notes',''), m_val, i.get('id', str(uuid.uuid4()))])
-    try: sheet.clear(); sheet.update(rows)
-    except: time.sleep(2); sheet.clear(); sheet.update(rows)
-    clear_data_cache()
+        for i in items: rows.append(lead_to_row(col_key, i))
+    mine = rows
+    if snapshot:
+        # Volledig herschrijven, maar vanaf wat er nú staat: onze wijzigingen t.o.v. de snapshot
+        # erop rebasen, zodat rijen en velden van anderen niet verdwijnen
+        flush_pending_writes()
+        width, id_i = len(PIPELINE_HEADERS), PIPELINE_HEADERS.index('ID')
+        current = [(r + [''] * width)[:width] for r in sheet.get_all_values()[1:]]
+        by_id = {r[id_i]: r for r in current if r[id_i]}
+        if len(by_id) == len(current):  # lege of dubbele ID's: dan toch alleen onze versie
+            ops, _ = pipeline_diff_ops(leads_data, snapshot)
+            kept = [o for o in (rebase_op(op, by_id.get(op['id']))[0] for op in ops) if o]
+            merged = apply_ops("Sheet1", [dict(zip(PIPELINE_HEADERS, r)) for r in current], kept)
+            rows = [PIPELINE_HEADERS] + [[r.get(h, '') for h in PIPELINE_HEADERS] for r in merged]
+    sheet.clear(); sheet.update(rows)
+    written = [[str(v) for v in r] for r in rows[1:]]
+    st.session_state['pipeline_snapshot'] = {'rows': {r[-1]: (n + 2, r, r) for n, r in enumerate(written)}, 'last_row': len(rows)}
+    clear_data_cache("Sheet1")
+    # Wijkt het resultaat af van onze eigen versie, dan ook deze sessie opnieuw laten inlezen
+    same = sorted([str(v) for v in r] for r in rows) == sorted([str(v) for v in r] for r in mine)
+    set_working_copy("Sheet1", records_from_values(rows), origin=st.session_state.get('session_id') if same else None)
+
+# Lead-index: ID -> (kolom, positie), bijgehouden naast leads_data door elke mutatie
+def build_lead_index(leads_data):
+    return {l['id']: (col_key, i) for col_key, items in leads_data.items() for i, l in enumerate(items)}
+
+def reindex_column(col_key):
+    idx = st.session_state['lead_index']
+    for i, l in enumerate(st.session_state['leads_data'][col_key]): idx[l['id']] = (col_key, i)
+
+def find_lead(lead_id):
+    loc = st.session_state['lead_index'].get(lead_id)
+    return st.session_state['leads_data'][loc[0]][loc[1]] if loc else None
+
+def lead_column(lead_id):
+    loc = st.session_state['lead_index'].get(lead_id)
+    return loc[0] if loc else None
+
+def add_lead(new_lead, col_key='col1'):
+    new_lead = Lead.from_dict(new_lead)
+    st.session_state['leads_data'][col_key].insert(0, new_lead)
+    st.session_state['leads_data'].touch()
+    reindex_column(col_key)
+    save_pipeline_data(st.session_state['leads_data'])
 
 def update_single_lead(updated_lead):
-    found = False
-    for col_key, leads in st.session_state['leads_data'].items():
-        for i, lead in enumerate(leads):
-            if lead['id'] == updated_lead['id']:
-                st.session_state['leads_data'][col_key][i] = updated_lead
-                found = True; break
-        if found: break
-    if found: save_pipeline_data(st.session_state['leads_data'])
+    updated_lead = Lead.from_dict(updated_lead)
+    loc = st.session_state['lead_index'].get(updated_lead['id'])
+    if loc:
+        st.session_state['leads_data'][loc[0]][loc[1]] = updated_lead
+        st.session_state['leads_data'].touch()
+        save_pipeline_data(st.session_state['leads_data'])
 
 def move_lead(lead_id, from_col, to_col):
-    lead_to_move = None
-    for i, l in enumerate(st.session_state['leads_data'][from_col]):
-        if l['id'] == lead_id:
-            lead_to_move = st.session_state['leads_data'][from_col].pop(i)
-            break
-    if lead_to_move:
+    loc = st.session_state['lead_index'].get(lead_id)
+    if loc and loc[0] == from_col:
+        lead_to_move = st.session_state['leads_data'][from_col].pop(loc[1])
         st.session_state['leads_data'][to_col].insert(0, lead_to_move)
+        st.session_state['leads_data'].touch()
+        # Posities schuiven alleen in de twee betrokken kolommen
+        reindex_column(from_col); reindex_column(to_col)
         save_pipeline_data(st.session_state['leads_data'])
 
 def trash_lead(lead_id):
-    for col_key, leads in st.session_state['leads_data'].items():
-        if col_key == 'trash': continue
-        for i, lead in enumerate(leads):
-            if lead['id'] == lead_id:
-                lead_to_move = st.session_state['leads_data'][col_key].pop(i)
-                st.session_state['leads_data']['trash'].insert(0, lead_to_move)
-                save_pipeline_data(st.session_state['leads_data'])
-                # Optioneel: reset de geselecteerde lead als deze weg is gegooid
-                st.session_state['selected_lead'] = None
-                st.rerun()
+    col_key = lead_column(lead_id)
+    if col_key and col_key != 'trash':
+        move_lead(lead_id, col_key, 'trash')
+        # Optioneel: reset de geselecteerde lead als deze weg is gegooid
+        st.session_state['selected_lead'] = None
+        st.rerun()
+
+def empty_trash():
+    for l in st.session_state['leads_data']['trash']:
+        st.session_state['lead_index'].pop(l['id'], None)
+    st.session_state['leads_data']['trash'] = []
+    st.session_state['leads_data'].touch()
+    save_pipeline_data(st.session_state['leads_data'])
 
 def fix_missing_ids():
     sheet = get_sheet("Sheet1")
     if not sheet: return
+    flush_pending_writes()
     records = sheet.get_all_records()
-    rows = [['Status', 'Bedrijf', 'Prijs', 'Contact', 'Email', 'Telefoon', 'Website', 'Projectmap', 'Notities', 'Onderhoud', 'ID']]
+    rows = [PIPELINE_HEADERS]
     seen = set(); change = False
     for r in records:
         cid = str(r.get('ID','')).strip()
@@ -283,102 +747,80 @@ def fix_missing_ids():
         seen.add(nid)
         rows.append([r.get('Status',''), r.get('Bedrijf',''), r.get('Prijs',''), r.get('Contact',''), r.get('Email',''), r.get('Telefoon',''), r.get('Website',''), r.get('Projectmap',''), r.get('Notities',''), r.get('Onderhoud','FALSE'), nid])
     if change: 
-        sheet.clear(); sheet.update(rows); clear_data_cache(); st.success("IDs fixed!"); st.rerun()
+        sheet.clear(); sheet.update(rows); clear_data_cache("Sheet1"); drop_working_copy("Sheet1")
+        st.session_state.pop('pipeline_snapshot', None)  # rijnummers kloppen niet meer -> volgende save volledig
+        st.success("IDs fixed!"); st.rerun()
     else: st.toast("IDs OK")
 
 # --- TAKEN LOGICA ---
-def load_tasks():
-    records = get_all_records_cached("Taken")
+def load_tasks(klant=None):
+    records = query_records("Taken", Klant=klant) if klant else get_all_records_cached("Taken")
     return [r for r in records if r.get('ID')]
 
 def add_task(klant, taak, categorie, deadline, prioriteit, notities):
-    sheet = get_sheet("Taken")
     row = ["FALSE", klant, taak, categorie, str(deadline), prioriteit, notities, str(uuid.uuid4())]
-    sheet.append_row(row)
-    clear_data_cache()
+    submit_writes([{'tab': 'Taken', 'id': row[-1], 'kind': 'upsert', 'row': row}])
 
 def add_batch_tasks(tasks_list):
-    sheet = get_sheet("Taken")
-    rows_to_add = []
+    ops = []
     for t in tasks_list:
-        rows_to_add.append(["FALSE", t['klant'], t['taak'], t['cat'], str(t['deadline']), t['prio'], "", str(uuid.uuid4())])
-    sheet.append_rows(rows_to_add)
-    clear_data_cache()
-
-def update_task_data(task_id, new_data):
-    sheet = get_sheet("Taken")
-    records = sheet.get_all_records()
-    for i, row in enumerate(records):
-        if str(row.get('ID')) == task_id:
-            sheet.update_cell(i + 2, 2, new_data['Klant'])
-            sheet.update_cell(i + 2, 3, new_data['Taak'])
-            sheet.update_cell(i + 2, 4, new_data['Categorie'])
-            sheet.update_cell(i + 2, 5, str(new_data['Deadline']))
-            sheet.update_cell(i + 2, 6, new_data['Prioriteit'])
-            sheet.update_cell(i + 2, 7, new_data['Notities'])
-            clear_data_cache(); return
+        row = ["FALSE", t['klant'], t['taak'], t['cat'], str(t['deadline']), t['prio'], "", str(uuid.uuid4())]
+        ops.append({'tab': 'Taken', 'id': row[-1], 'kind': 'upsert', 'row': row})
+    submit_writes(ops)
+
+def update_task_data(task_id, new_data, base=None):
+    # Klant t/m Notities (kolom B-G) als één ranged write. Met base (de taak zoals het formulier
+    # hem toonde) alleen de velden die echt veranderd zijn, zodat edits van anderen blijven staan.
+    cols = ['Klant', 'Taak', 'Categorie', 'Deadline', 'Prioriteit', 'Notities']
+    cells = {TASK_HEADERS.index(k) + 1: str(new_data[k]) if k == 'Deadline' else new_data[k] for k in cols}
+    if base is not None:
+        cells = {c: v for c, v in cells.items() if str(v) != str(base.get(TASK_HEADERS[c - 1], ''))}
+        if not cells: return
+    submit_writes([{'tab': 'Taken', 'id': task_id, 'kind': 'cells', 'cells': cells}])
 
 def toggle_task_status(task_id, current_status):
-    sheet = get_sheet("Taken")
-    records = sheet.get_all_records()
-    for i, row in enumerate(records):
-        if str(row.get('ID')) == task_id:
-            new_val = "TRUE" if current_status == "FALSE" else "FALSE"
-            sheet.update_cell(i + 2, 1, new_val)
-            clear_data_cache(); return
+    new_val = "TRUE" if current_status == "FALSE" else "FALSE"
+    submit_writes([{'tab': 'Taken', 'id': task_id, 'kind': 'cells', 'cells': {1: new_val}}])
 
 def delete_completed_tasks():
-    sheet = get_sheet("Taken")
-    records = sheet.get_all_records()
-    rows = [['Status', 'Klant', 'Taak', 'Categorie', 'Deadline', 'Prioriteit', 'Notities', 'ID']]
-    for r in records:
-        if str(r.get('Status')).upper() != "TRUE":
-            rows.append([r.get('Status'), r.get('Klant'), r.get('Taak'), r.get('Categorie'), r.get('Deadline'), r.get('Prioriteit'), r.get('Notities'), r.get('ID')])
-    sheet.clear(); sheet.update(rows)
-    clear_data_cache()
+    # Base = status afgevinkt: heeft iemand een taak intussen weer opengezet, dan blijft hij staan
+    done = [t['ID'] for t in load_tasks() if str(t.get('Status')).upper() == "TRUE"]
+    submit_writes([{'tab': 'Taken', 'id': tid, 'kind': 'delete', 'base': {1: "TRUE"}} for tid in done])
 
 def delete_single_task(task_id):
-    sheet = get_sheet("Taken")
-    records = sheet.get_all_records()
-    rows = [['Status', 'Klant', 'Taak', 'Categorie', 'Deadline', 'Prioriteit', 'Notities', 'ID']]
-    for r in records:
-        if str(r.get('ID')) != task_id:
-            rows.append([r.get('Status'), r.get('Klant'), r.get('Taak'), r.get('Categorie'), r.get('Deadline'), r.get('Prioriteit'), r.get('Notities'), r.get('ID')])
-    sheet.clear(); sheet.update(rows)
-    clear_data_cache()
+    submit_writes([{'tab': 'Taken', 'id': task_id, 'kind': 'delete'}])
+
+def bulk_update_tasks(task_ids, action, value=None):
+    # Alle geselecteerde taken in één set ops -> één flush (één batch_update of één delete-request)
+    if action == 'delete':
+        submit_writes([{'tab': 'Taken', 'id': tid, 'kind': 'delete'} for tid in task_ids]); return
+    col = TASK_HEADERS.index({'status': 'Status', 'deadline': 'Deadline', 'priority': 'Prioriteit'}[action]) + 1
+    submit_writes([{'tab': 'Taken', 'id': tid, 'kind': 'cells', 'cells': {col: value}} for tid in task_ids])
 
 # --- UREN LOGICA ---
-def load_hours():
-    records = get_all_records_cached("Uren")
+def load_hours(klant=None):
+    records = query_records("Uren", Klant=klant) if klant else get_all_records_cached("Uren")
     return [r for r in records if r.get('ID')]
 
 def save_queued_hours(queue):
-    sheet = get_sheet("Uren")
-    rows = []
+    ops = []
     for h in queue:
         totaal = float(h['uren']) * HOURLY_RATE
-        rows.append([str(h['datum']), h['klant'], float(h['uren']), h['desc'], HOURLY_RATE, totaal, str(uuid.uuid4())])
+        row = [str(h['datum']), h['klant'], float(h['uren']), h['desc'], HOURLY_RATE, totaal, str(uuid.uuid4())]
+        ops.append({'tab': 'Uren', 'id': row[-1], 'kind': 'upsert', 'row': row})
     try: 
-        sheet.append_rows(rows)
-        clear_data_cache(); return True
+        submit_writes(ops); return True
     except: return False
 
 def delete_hour_entry(entry_id):
-    sheet = get_sheet("Uren")
-    records = sheet.get_all_records()
-    rows = [['Datum', 'Klant', 'Uren', 'Omschrijving', 'Tarief', 'Totaal', 'ID']]
-    for r in records:
-        if str(r.get('ID')) != entry_id:
-            rows.append([r['Datum'], r['Klant'], r['Uren'], r['Omschrijving'], r['Tarief'], r['Totaal'], r['ID']])
-    sheet.clear(); sheet.update(rows)
-    clear_data_cache()
+    submit_writes([{'tab': 'Uren', 'id': entry_id, 'kind': 'delete'}])
 
 # --- INSPIRATIE LOGICA ---
 def load_inspirations():
     records = get_all_records_cached("Inspiratie")
     valid_records = []
     for r in records:
-        r_id = r.get('ID') or r.get('id') or r.get('ID ')
+        r_id = record_id(r)
         if r_id:
             valid_records.append(r)
     return valid_records
@@ -387,48 +829,252 @@ def add_inspiration(naam, url, notitie, tag):
     sheet = get_sheet("Inspiratie")
     if not sheet: st.error("Maak het tabblad 'Inspiratie' aan in je Google Sheet!"); return
     row = [naam, url, notitie, tag, str(uuid.uuid4())]
-    try: sheet.append_row(row); clear_data_cache(); return True
-    except: time.sleep(1); sheet.append_row(row); clear_data_cache(); return True
+    submit_writes([{'tab': 'Inspiratie', 'id': row[-1], 'kind': 'upsert', 'row': row}])
+    return True
 
 def delete_inspiration(entry_id):
-    sheet = get_sheet("Inspiratie")
-    if not sheet: return
-    records = sheet.get_all_records()
-    rows = [['Naam', 'URL', 'Notitie', 'Tag', 'ID']]
-    for r in records:
-        r_id = r.get('ID') or r.get('id') or r.get('ID ')
-        if str(r_id) != str(entry_id):
-            n = r.get('Naam') or r.get('naam') or r.get('Naam ') or ''
-            u = r.get('URL') or r.get('url') or r.get('URL ') or ''
-            nt = r.get('Notitie') or r.get('notitie') or r.get('Notitie ') or ''
-            t = r.get('Tag') or r.get('tag') or r.get('Tag ') or ''
-            rows.append([n, u, nt, t, r_id])
-            
-    sheet.clear()
-    sheet.update(rows)
-    clear_data_cache()
+    submit_writes([{'tab': 'Inspiratie', 'id': entry_id, 'kind': 'delete'}])
+
+# --- ZOEKINDEX ---
+# Eén index voor het hele proces, naast de werkkopieën. Een tabblad wordt in bulk geïndexeerd
+# zodra het geladen is (set_working_copy), niet pas bij de eerste zoekopdracht. Ingediende
+# writes gaan er meteen in (index_ops), de flush werkt de documenten bij uit de kopie.
+# Per tabblad onthouden we de storeversie; loopt die achter, dan opnieuw indexeren.
+SEARCH_TABS = {'Sheet1': 'lead', 'Taken': 'task', 'Uren': 'hour', 'Inspiratie': 'insp'}
+SEARCH_PAGES = {'lead': ('📊', 'Pipeline'), 'task': ('✅', 'Projecten'), 'hour': ('⏱️', 'Uren'), 'insp': ('💡', 'Inspiratie')}
+
+@st.cache_resource
+def get_search_store():
+    return {'lock': threading.Lock(), 'index': SearchIndex(), 'versions': {}}
+
+def record_doc(sheet_name, r):
+    # -> (kind, id, titel, ondertitel, velden, ref) of None
+    rid = record_id(r)
+    if not rid: return None
+    if sheet_name == 'Sheet1':
+        if not r.get('Bedrijf'): return None
+        return ('lead', str(rid).strip(), r.get('Bedrijf'), r.get('Contact', ''), [r.get(f) for f in ('Contact', 'Email', 'Telefoon', 'Website', 'Notities', 'Prijs')], None)
+    if sheet_name == 'Taken': return ('task', rid, r.get('Taak'), r.get('Klant'), [r.get('Klant'), r.get('Categorie'), r.get('Notities')], r.get('Klant'))
+    if sheet_name == 'Uren': return ('hour', rid, r.get('Omschrijving') or "(geen omschrijving)", f"{r.get('Klant')} · {r.get('Datum')} · {r.get('Uren')}u", [r.get('Klant')], r.get('Klant'))
+    if sheet_name == 'Inspiratie': return ('insp', rid, r.get('Naam'), r.get('Tag'), [r.get('URL'), r.get('Notitie'), r.get('Tag')], None)
+
+def index_tab(sheet_name, records, version):
+    if sheet_name not in SEARCH_TABS: return
+    docs = [d for d in (record_doc(sheet_name, r) for r in records) if d]
+    store = get_search_store()
+    with store['lock']:
+        # Een tragere lader met een oudere versie overschrijft een nieuwere index niet
+        if version < store['versions'].get(sheet_name, 0): return
+        store['index'].load(docs, SEARCH_TABS[sheet_name])
+        store['versions'][sheet_name] = version
+
+def index_records(sheet_name, records, ids, version=None):
+    # Alleen de documenten van `ids` bijwerken uit `records` (na een write)
+    if sheet_name not in SEARCH_TABS: return
+    ids = {str(i) for i in ids}
+    docs = {str(record_id(r)).strip(): record_doc(sheet_name, r) for r in records if record_id(r) and str(record_id(r)).strip() in ids}
+    store = get_search_store()
+    with store['lock']:
+        for i in ids:
+            if docs.get(i): store['index'].add(*docs[i])
+            else: store['index'].remove(SEARCH_TABS[sheet_name], i)
+        if version is not None and store['versions'].get(sheet_name) == version - 1: store['versions'][sheet_name] = version
+
+def get_search_index():
+    # Tabbladen die achterlopen (bv. kopie weggegooid of nooit geladen) opnieuw indexeren
+    store = get_search_store()
+    for sheet_name in SEARCH_TABS:
+        if store['versions'].get(sheet_name) == store_version(sheet_name): continue
+        records = get_all_records_cached(sheet_name)
+        with store['lock']: stale = store['versions'].get(sheet_name) != store_version(sheet_name)
+        if stale: index_tab(sheet_name, records, store_version(sheet_name))
+    return store
+
+def search(query, limit=12):
+    store = get_search_index()
+    with store['lock']: return store['index'].search(query, limit=limit)
+
+def index_ops(ops):
+    for sheet_name in {op['tab'] for op in ops if op['tab'] in SEARCH_TABS}:
+        # Records inclusief de net ingediende ops (read-your-writes)
+        index_records(sheet_name, get_all_records_cached(sheet_name), [op['id'] for op in ops if op['tab'] == sheet_name])
+
+def jump_to(hit, known_client):
+    # Callback van een zoekresultaat: naar de juiste pagina, filters zo dat het item zichtbaar is
+    st.session_state['active_page'] = SEARCH_PAGES[hit['kind']][1]
+    st.session_state['global_search'] = ""
+    if hit['kind'] == 'lead':
+        st.session_state['selected_lead'] = hit['id']; st.session_state['edit_mode'] = False
+    elif hit['kind'] == 'task':
+        st.session_state['task_filter_client'] = hit['ref'] if known_client else "Alle Projecten"
+        st.session_state['task_filter_cat'] = "Alle Categorieën"
+        st.session_state['task_focus'] = hit['id']
+    elif hit['kind'] == 'hour':
+        st.session_state['hour_overview_filter'] = hit['ref'] if known_client else "Alle Klanten"
+        st.session_state['hour_overview_all'] = True; st.session_state.pop('hour_overview_range', None)
+        st.session_state['hour_focus'] = hit['id']
+    elif hit['kind'] == 'insp':
+        st.session_state['inspi_filter'] = "Alle Inspiratie"
 
 # --- HELPER ---
+# Kaart-HTML per lead, gecachet op (ID, hash van de getoonde velden); gedeeld over sessies
+@st.cache_resource
+def get_card_html_cache():
+    return {'lock': threading.Lock(), 'cards': {}}
+
+def lead_card_html(lead):
+    fields = (lead['name'], bool(lead.get('maintenance')), lead.get('price'), lead.get('contact'), lead.get('phone'))
+    key = (lead['id'], hash(fields))
+    cache = get_card_html_cache()
+    with cache['lock']: html = cache['cards'].get(key)
+    if html is None:
+        dn = lead['name']
+        if lead.get('maintenance'): dn += " 🔧"
+        title_html = f"<div style='font-weight:bold; color:{THEME_COLOR}; font-size:1.05em; margin-bottom:5px;'>{dn}</div>"
+        info_html = ""
+        if lead.get('price'): info_html += f"💰 {lead['price']}<br>"
+        if lead.get('contact'): info_html += f"👤 {lead['contact']}<br>"
+        if lead.get('phone'): info_html += f"📞 {lead['phone']}"
+        if info_html: info_html = f"<div style='font-size:0.85em; color:#ccc; margin-bottom:10px; line-height:1.5;'>{info_html}</div>"
+        html = (title_html, info_html)
+        # Sessies draaien in eigen threads: evictie en toevoegen onder het slot
+        with cache['lock']:
+            cards = cache['cards']
+            while len(cards) >= CARD_CACHE_SIZE: cards.pop(next(iter(cards)))
+            cards[key] = html
+    return html
+
 def parse_price(price_str):
     if not price_str: return 0.0
     clean = str(price_str).replace('€', '').replace('.', '').replace(',', '.').strip().split(' ')[0]
     try: return float(clean)
     except: return 0.0
 
+# --- AFGELEIDE DATA (ROLLUPS) ---
+# Versie van de data zoals de app hem ziet: tabbladversie, storeversie (gaat omhoog bij élke
+# nieuwe inhoud van de werkkopie, uit Sheet, spiegel of write) plus nog openstaande writes.
+# Sleutel voor alles wat we uit een heel tabblad afleiden (dashboard, kalender, lijst).
+def data_version(sheet_name):
+    ops = pending_writes(sheet_name)
+    return (get_tab_version(sheet_name), store_version(sheet_name), hash(json.dumps(ops, sort_keys=True, default=str)) if ops else 0)
+
+def parse_dates(values):
+    # ISO (zoals wij schrijven) in één keer; alleen wat overblijft met dag-eerst parsen
+    s = pd.Series(values, dtype="object").astype(str)
+    d = pd.to_datetime(s, format='%Y-%m-%d', errors='coerce')
+    rest = d.isna()
+    if rest.any(): d[rest] = pd.to_datetime(s[rest], dayfirst=True, errors='coerce')
+    return d
+
+def parse_prices(values):
+    # Gevectoriseerde parse_price
+    s = pd.Series(values, dtype="object").fillna('').astype(str)
+    s = s.str.replace('€', '', regex=False).str.replace('.', '', regex=False).str.replace(',', '.', regex=False).str.strip().str.split(' ').str[0]
+    return pd.to_numeric(s, errors='coerce').fillna(0.0)
+
+@st.cache_data(ttl=600)
+def hours_frame(version):
+    df = pd.DataFrame(load_hours(), columns=HOUR_HEADERS)
+    df['Totaal'] = pd.to_numeric(df['Totaal'], errors='coerce').fillna(0)
+    df['Uren'] = pd.to_numeric(df['Uren'], errors='coerce').fillna(0)
+    df['Dag'] = parse_dates(df['Datum']).dt.normalize()
+    df['Maand'] = df['Dag'].dt.strftime('%Y-%m')
+    df['Jaar'] = df['Dag'].dt.strftime('%Y')
+    return df
+
+# Uren per (dag, klant): klein genoeg om voor elk filter opnieuw op te tellen
+@st.cache_data(ttl=600)
+def hour_day_totals(version):
+    # dropna=False: regels zonder geldige datum tellen mee, net als in de urenlijst
+    return hours_frame(version).groupby(['Dag', 'Klant'], dropna=False).agg(Uren=('Uren', 'sum'), Totaal=('Totaal', 'sum'), Aantal=('ID', 'count')).reset_index()
+
+@st.cache_data(ttl=600)
+def hours_ledger(version):
+    # Nieuwste eerst; zonder geldige datum achteraan
+    return hours_frame(version).sort_values('Dag', ascending=False, kind='stable', na_position='last').reset_index(drop=True)
+
+def range_mask(df, klant=None, start=None, end=None):
+    mask = pd.Series(True, index=df.index)
+    if klant: mask &= df['Klant'] == klant
+    if start is not None: mask &= df['Dag'] >= pd.Timestamp(start)
+    if end is not None: mask &= df['Dag'] <= pd.Timestamp(end)
+    return mask
+
+@st.cache_data(ttl=600)
+def hour_rollups(version):
+    df = hours_frame(version)
+    per_month = df.groupby('Maand')[['Totaal', 'Uren']].sum()
+    per_month_client = df.groupby(['Maand', 'Klant'])['Totaal'].sum()
+    return {
+        'months': per_month.to_dict('index'),
+        'month_series': per_month['Totaal'],
+        'month_clients': {m: grp.droplevel(0).sort_values(ascending=False) for m, grp in per_month_client.groupby(level=0)},
+        'years': df.groupby('Jaar')[['Totaal', 'Uren']].sum().to_dict('index'),
+        'clients': df.groupby('Klant')[['Totaal', 'Uren']].sum().to_dict('index'),
+    }
+
+# Exports per (soort, klanten, periode, dataversie); worden pas bij een klik opgebouwd
+@st.cache_data(ttl=600, max_entries=50)
+def export_hours(version, kind, klanten, start, end, label=None):
+    df = hours_frame(version)
+    sel = df[range_mask(df, None, start, end) & (df['Klant'].isin(klanten) if klanten else True)]
+    if kind == 'csv': return exports.hours_csv(sel)
+    if kind == 'xlsx': return exports.specification_xlsx([(label or ", ".join(klanten), sel)], THEME_COLOR)
+    groups = exports.group_by_client(sel)
+    if kind == 'zip': return exports.specification_zip(groups, THEME_COLOR)
+    return exports.specification_xlsx(groups, THEME_COLOR)
+
+# Kalender: per klant per dag opgeteld; alleen het zichtbare venster gaat naar de browser
+@st.cache_data(ttl=600)
+def build_calendar_events(version, start, end):
+    days = hour_day_totals(version)
+    win = days[(days['Dag'] >= start) & (days['Dag'] < end)]
+    if win.empty: return []  # lege kolommen zijn float64; str + float64 faalt in pandas 3
+    titles = win['Klant'].astype(str) + " (" + win['Uren'].map('{:g}'.format) + "u" + win['Aantal'].map(lambda n: f", {n}×" if n > 1 else "") + ")"
+    return [{"title": t, "start": d, "allDay": True, "backgroundColor": THEME_COLOR, "borderColor": THEME_COLOR} for t, d in zip(titles, win['Dag'].dt.strftime('%Y-%m-%d'))]
+
+def calendar_window(month_start):
+    # Zichtbare maand plus marge voor de dagen van de vorige/volgende maand in de maandweergave
+    m = pd.Timestamp(month_start)
+    return m - CALENDAR_MARGIN, m + pd.offsets.MonthBegin(1) + CALENDAR_MARGIN
+
+@st.cache_data(ttl=600)
+def landed_value(prices):
+    return float(parse_prices(list(prices)).sum())
+
 # --- INITIALISATIE ---
-if 'leads_data' not in st.session_state:
+if 'session_id' not in st.session_state: st.session_state['session_id'] = str(uuid.uuid4())
+get_api_recorder().begin_rerun(st.session_state['session_id'], st.session_state.get('active_page', 'Dashboard'))
+
+def subscribe_pipeline():
+    # leads_data (opnieuw) opbouwen uit de gedeelde kopie van Sheet1 en onthouden welke versie dat was
     loaded = load_pipeline_data()
-    st.session_state['leads_data'] = loaded if loaded else {'col1': [], 'col2': [], 'col3': [], 'col4': [], 'trash': []}
+    st.session_state['leads_data'] = loaded if loaded else LeadStore()
+    st.session_state['lead_index'] = build_lead_index(st.session_state['leads_data'])
+    st.session_state['pipeline_seen'] = store_version("Sheet1")
+
+if 'leads_data' not in st.session_state:
+    prefetch_tabs()
+    subscribe_pipeline()
+else:
+    # Heeft een andere sessie (of de Sheet zelf) de pipeline gewijzigd? Dan alleen Sheet1 opnieuw inlezen.
+    check_tab_changes(["Sheet1"])
+    changed, version = store_changes("Sheet1", st.session_state.get('pipeline_seen'), st.session_state['session_id'])
+    if changed:
+        subscribe_pipeline()
+        if st.session_state.get('selected_lead') and not find_lead(st.session_state['selected_lead']): st.session_state['selected_lead'] = None
+    else: st.session_state['pipeline_seen'] = version
+# Sessies van vóór de lead store (dicts per lead) omzetten
+if not isinstance(st.session_state['leads_data'], LeadStore): st.session_state['leads_data'] = LeadStore(st.session_state['leads_data'])
+if 'lead_index' not in st.session_state: st.session_state['lead_index'] = build_lead_index(st.session_state['leads_data'])
 if 'hour_queue' not in st.session_state: st.session_state['hour_queue'] = [] 
 if 'selected_lead' not in st.session_state: st.session_state['selected_lead'] = None
 
 # Active Page Initialisatie
 if 'active_page' not in st.session_state: st.session_state['active_page'] = 'Dashboard'
 
-all_companies = []
-for col_list in st.session_state['leads_data'].values():
-    for l in col_list: all_companies.append(l['name'])
-all_companies.sort()
+# Gedeelde, alleen-lezen lijst uit de lead store (wordt pas na een mutatie opnieuw gemaakt)
+all_companies = st.session_state['leads_data'].names()
 
 
 # ==================================================
@@ -455,39 +1101,68 @@ with st.sidebar:
     
     st.markdown("<div style='margin-top: 50px;'></div>", unsafe_allow_html=True)
     if st.button("🔄", help="Haal de nieuwste gegevens op uit Google Sheets"):
-        clear_data_cache()
+        flush_pending_writes()
+        # Alleen tabbladen die echt gewijzigd zijn opnieuw ophalen (samen in één request)
+        changed = check_tab_changes(MIRRORED_TABS, force=True)
+        if changed: prefetch_tabs(changed, force=True)
         st.rerun()
 
+    # Status van de write-behind wachtrij
+    wq = get_write_queue()
+    if wq:
+        ws = wq.status()
+        if ws['state'] == 'error' and ws['last']: st.caption(f"⚠️ Opslaan mislukt, nieuwe poging… ({ws['last']['error']})")
+        elif ws['state'] == 'dropped' and ws['last']: st.caption(f"❌ {ws['last']['dropped']} wijziging(en) niet opgeslagen ({ws['last']['error']})")
+        elif ws['pending']: st.caption(f"⏳ {ws['pending']} wijziging(en) opslaan…")
+        elif ws['last']: st.caption(f"✅ Opgeslagen {time.strftime('%H:%M:%S', time.localtime(ws['last']['started']))}")
+        # Eigen wijzigingen die blijvend mislukten één keer melden
+        for d in ws['dropped']:
+            if d['seq'] <= st.session_state.get('drops_seen', 0): continue
+            own = [o for o in d['ops'] if o['origin'] == st.session_state['session_id']]
+            if own: st.toast(f"❌ {len(own)} wijziging(en) niet opgeslagen: {d['error']}")
+            st.session_state['drops_seen'] = d['seq']
+
+    # Eén keer melden als een eigen write op een door een ander gewijzigde rij is samengevoegd
+    cl = get_conflict_log()
+    with cl['lock']: mine = [e for e in cl['entries'] if e['origin'] == st.session_state['session_id'] and e['seq'] > st.session_state.get('conflicts_seen', 0)]
+    for e in mine:
+        if e['skipped']: st.toast(f"⚠️ Niet toegepast: rij ({e['tab']}) is intussen door een ander gewijzigd of verwijderd")
+        elif e['conflicts']: st.toast(f"⚠️ Tegelijk gewijzigd ({e['tab']}: {', '.join(e['conflicts'])}) — jouw waarde is opgeslagen")
+        st.session_state['conflicts_seen'] = e['seq']
+
 
 # ==================================================
 # 🖥️ MAIN CONTENT AREA (Op basis van actieve pagina)
 # ==================================================
 
+# ================= 🔎 ZOEKEN (ALLE PAGINA'S) =================
+search_q = st.text_input("🔎 Zoeken", key="global_search", placeholder="🔎 Zoek op bedrijf, contact, e-mail, telefoon, taak, uren of notitie...", label_visibility="collapsed")
+if len(search_q.strip()) >= 2:
+    hits = search(search_q, limit=12)
+    if not hits: st.caption("Niets gevonden.")
+    with st.container(border=bool(hits)):
+        for n, hit in enumerate(hits):
+            icon = SEARCH_PAGES[hit['kind']][0]
+            st.button(f"{icon} {hit['title']} — {hit['subtitle']}", key=f"search_hit_{n}", on_click=jump_to, args=(hit, hit.get('ref') in all_companies), use_container_width=True)
+
 # ================= PAGINA 1: DASHBOARD =================
 if st.session_state['active_page'] == 'Dashboard':
     st.title("📈 Financieel Dashboard")
-    all_hours = load_hours()
-    if all_hours:
-        df = pd.DataFrame(all_hours)
-        df['Totaal'] = pd.to_numeric(df['Totaal'], errors='coerce').fillna(0)
-        df['Uren'] = pd.to_numeric(df['Uren'], errors='coerce').fillna(0)
-        df['Datum'] = pd.to_datetime(df['Datum'], errors='coerce')
-        df['Maand'] = df['Datum'].dt.strftime('%Y-%m')
-        
+    rollups = hour_rollups(data_version("Uren"))
+    pipe_val = landed_value(tuple(l.get('price') for l in st.session_state['leads_data']['col4']))
+    if rollups['months']:
         col_fil, col_empty = st.columns([1, 2])
         with col_fil:
             cur_m = datetime.now().strftime('%Y-%m')
-            months = sorted(df['Maand'].unique().tolist(), reverse=True)
+            months = sorted(rollups['months'], reverse=True)
             if cur_m not in months: months.insert(0, cur_m)
             sel_month = st.selectbox("📅 Maand:", months, key="dash_month_filter")
         
-        m_data = df[df['Maand'] == sel_month]
-        
-        pipe_val = sum([parse_price(l.get('price')) for l in st.session_state['leads_data']['col4']])
+        m_data = rollups['months'].get(sel_month, {'Totaal': 0.0, 'Uren': 0.0})
         
         m1, m2, m3 = st.columns(3)
-        m1.metric(f"Waarde Uren ({sel_month})", f"€ {m_data['Totaal'].sum():,.2f}")
-        m2.metric(f"Gewerkte Uren ({sel_month})", f"{m_data['Uren'].sum():.1f} uur")
+        m1.metric(f"Waarde Uren ({sel_month})", f"€ {m_data['Totaal']:,.2f}")
+        m2.metric(f"Gewerkte Uren ({sel_month})", f"{m_data['Uren']:.1f} uur")
         m3.metric("Totaal Deals Geland 🎉", f"€ {pipe_val:,.2f}")
         
         st.divider(); 
@@ -495,7 +1170,11 @@ if st.session_state['active_page'] == 'Dashboard':
         c_chart, c_list = st.columns([2, 1])
         with c_chart:
             st.subheader("📈 Omzetverloop per Maand")
-            if not df.empty: st.line_chart(df.groupby('Maand')['Totaal'].sum(), color=THEME_COLOR)
+            st.line_chart(rollups['month_series'], color=THEME_COLOR)
+            m_clients = rollups['month_clients'].get(sel_month)
+            if m_clients is not None:
+                st.subheader(f"👥 Omzet per Klant ({sel_month})")
+                st.bar_chart(m_clients.head(15), color=THEME_COLOR)
             
         with c_list:
             st.subheader("🔧 Contracten")
@@ -512,7 +1191,6 @@ if st.session_state['active_page'] == 'Dashboard':
             else: st.caption("Geen contracten.")
     else:
         st.info("Nog geen uren geschreven.")
-        pipe_val = sum([parse_price(l.get('price')) for l in st.session_state['leads_data']['col4']])
         st.metric("Totaal Deals Geland 🎉", f"€ {pipe_val:,.2f}")
 
 # ================= PAGINA 2: PIPELINE =================
@@ -542,8 +1220,7 @@ elif st.session_state['active_page'] == 'Pipeline':
                         'project_map': proj, 'price': pri, 'notes': not_,
                         'maintenance': m_contr
                     }
-                    st.session_state['leads_data']['col1'].insert(0, ni)
-                    save_pipeline_data(st.session_state['leads_data'])
+                    add_lead(ni)
                     st.success("Deal toegevoegd aan 'Te benaderen'!")
                     time.sleep(1); st.rerun()
 
@@ -556,10 +1233,7 @@ elif st.session_state['active_page'] == 'Pipeline':
         ('col4', 'Geland 🎉')
     ]
     
-    all_leads = []
-    for k, name in main_cols:
-        all_leads.extend(st.session_state['leads_data'][k])
-    all_leads.extend(st.session_state['leads_data']['trash'])
+    lead_store = st.session_state['leads_data']
     
     ui_cols = st.columns(len(main_cols))
     
@@ -568,19 +1242,14 @@ elif st.session_state['active_page'] == 'Pipeline':
             st.markdown(f"<div style='background-color:#2b313e; padding:10px; border-radius:6px; border-top:4px solid {THEME_COLOR}; text-align:center; font-weight:bold; margin-bottom:10px;'>{c_name} <span style='color:#aaa; font-size:0.9em'>({len(st.session_state['leads_data'][c_key])})</span></div>", unsafe_allow_html=True)
             
             with st.container(height=650, border=False):
-                for lead in st.session_state['leads_data'][c_key]:
+                col_leads = st.session_state['leads_data'][c_key]
+                limit = st.session_state.get(f"kanban_limit_{c_key}", KANBAN_PAGE_SIZE)
+                for lead in col_leads[:limit]:
                     with st.container(border=True):
-                        dn = lead['name']
-                        if lead.get('maintenance'): dn += " 🔧"
-                        st.markdown(f"<div style='font-weight:bold; color:{THEME_COLOR}; font-size:1.05em; margin-bottom:5px;'>{dn}</div>", unsafe_allow_html=True)
-                        
-                        info_html = ""
-                        if lead.get('price'): info_html += f"💰 {lead['price']}<br>"
-                        if lead.get('contact'): info_html += f"👤 {lead['contact']}<br>"
-                        if lead.get('phone'): info_html += f"📞 {lead['phone']}"
-                        
+                        title_html, info_html = lead_card_html(lead)
+                        st.markdown(title_html, unsafe_allow_html=True)
                         if info_html:
-                            st.markdown(f"<div style='font-size:0.85em; color:#ccc; margin-bottom:10px; line-height:1.5;'>{info_html}</div>", unsafe_allow_html=True)
+                            st.markdown(info_html, unsafe_allow_html=True)
                         
                         c_view, c_left, c_right = st.columns([2, 1, 1])
                         
@@ -598,6 +1267,11 @@ elif st.session_state['active_page'] == 'Pipeline':
                                 move_lead(lead['id'], c_key, main_cols[idx+1][0])
                                 st.rerun()
 
+                if len(col_leads) > limit:
+                    if st.button(f"⬇️ Meer laden ({limit} van {len(col_leads)})", key=f"more_{c_key}", use_container_width=True):
+                        st.session_state[f"kanban_limit_{c_key}"] = limit + KANBAN_PAGE_SIZE
+                        st.rerun()
+
     # Prullenbak
     st.write("")
     with st.expander(f"🗑️ Prullenbak ({len(st.session_state['leads_data']['trash'])} leads)", expanded=False):
@@ -605,7 +1279,8 @@ elif st.session_state['active_page'] == 'Pipeline':
             st.caption("Prullenbak is leeg.")
         else:
             trash_cols = st.columns(4) 
-            for t_idx, t_lead in enumerate(st.session_state['leads_data']['trash']):
+            trash_limit = st.session_state.get("kanban_limit_trash", KANBAN_PAGE_SIZE)
+            for t_idx, t_lead in enumerate(st.session_state['leads_data']['trash'][:trash_limit]):
                 with trash_cols[t_idx % 4]:
                     with st.container(border=True):
                         st.write(f"**{t_lead['name']}**")
@@ -616,25 +1291,24 @@ elif st.session_state['active_page'] == 'Pipeline':
                         if tc2.button("♻️ Herstel", key=f"rest_{t_lead['id']}", help="Zet terug in Te benaderen", use_container_width=True):
                             move_lead(t_lead['id'], 'trash', 'col1')
                             st.rerun()
+            if len(st.session_state['leads_data']['trash']) > trash_limit:
+                if st.button(f"⬇️ Meer laden ({trash_limit} van {len(st.session_state['leads_data']['trash'])})", key="more_trash"):
+                    st.session_state["kanban_limit_trash"] = trash_limit + KANBAN_PAGE_SIZE
+                    st.rerun()
             st.divider()
             if st.button("🚨 Prullenbak Definitief Legen", type="primary"):
-                st.session_state['leads_data']['trash'] = []
-                save_pipeline_data(st.session_state['leads_data'])
+                empty_trash()
                 st.rerun()
 
     # --- 3. HET DETAILS/BEWERK GEDEELTE (BUGVRIJ) ---
     st.divider()
-    if len(all_leads) > 0:
+    if lead_store.count() > 0:
         c_sel, c_inf = st.columns([1, 2])
         with c_sel:
             st.markdown("#### 🔎 Snel Zoeken / Details")
             
-            # Voorkom duplicate keys in dropdown
-            d_opts = {}
-            for l in all_leads:
-                lbl = l['name']
-                if lbl in d_opts: lbl = f"{l['name']} ({l['id'][:4]})"
-                d_opts[lbl] = l['id']
+            # Voorkom duplicate keys in dropdown (label -> ID, gecachet in de lead store)
+            d_opts = lead_store.select_options()
                 
             id_to_label = {v: k for k, v in d_opts.items()}
             
@@ -657,7 +1331,7 @@ elif st.session_state['active_page'] == 'Pipeline':
             )
             
             sel_id = d_opts.get(sel_name)
-            sel = next((l for l in all_leads if l['id'] == sel_id), None)
+            sel = find_lead(sel_id)
             
             # Veiligheid: als selected_lead nog leeg was bij opstarten, sync met de eerste
             if st.session_state.get('selected_lead') is None and sel_id:
@@ -700,7 +1374,7 @@ elif st.session_state['active_page'] == 'Pipeline':
                             if st.button("✏️ Bewerken", key=f"btn_edit_mode_{sel['id']}", use_container_width=True):
                                 st.session_state['edit_mode'] = True; st.rerun()
                         with r3:
-                            in_trash = any(l['id'] == sel['id'] for l in st.session_state['leads_data']['trash'])
+                            in_trash = lead_column(sel['id']) == 'trash'
                             if not in_trash:
                                 # Dynamische KEY toevoegen voorkomt foute clicks!
                                 if st.button("🗑️ Prullenbak", key=f"btn_trash_{sel['id']}", use_container_width=True):
@@ -786,17 +1460,43 @@ elif st.session_state['active_page'] == 'Projecten':
     with c_filt1: k_filt = st.selectbox("📂 Filter op Klant:", ["Alle Projecten"] + all_companies, key="task_filter_client")
     with c_filt2: c_filt = st.selectbox("🏷️ Filter op Categorie:", ["Alle Categorieën"] + TASK_CATEGORIES, key="task_filter_cat")
 
-    all_tasks = load_tasks()
+    all_tasks = load_tasks(k_filt if k_filt != "Alle Projecten" else None)
     disp = all_tasks
-    if k_filt != "Alle Projecten": disp = [t for t in disp if t.get('Klant') == k_filt]
     if c_filt != "Alle Categorieën": disp = [t for t in disp if t.get('Categorie') == c_filt]
 
     if not disp: st.info(f"Geen taken gevonden.")
     else:
         p_map = {"🔥 Hoog": 1, "⏺️ Midden": 2, "💤 Laag": 3}
         disp.sort(key=lambda x: (str(x.get('Status')).upper() == 'TRUE', p_map.get(x.get('Prioriteit'), 2), x.get('Deadline')))
-        st.write(f"**{len(disp)} taken**")
-        for t in disp:
+        c_cnt, c_mode = st.columns([3, 1])
+        c_cnt.write(f"**{len(disp)} taken**")
+        select_mode = c_mode.toggle("☑️ Selecteren", key="task_select_mode")
+        if select_mode:
+            # Selectie staat in de checkbox-keys; één actie voor alles, daarna één rerun
+            selected = [t['ID'] for t in disp if st.session_state.get(f"sel_task_{t['ID']}")]
+            with st.container(border=True):
+                b1, b2, b3, b4 = st.columns([2, 2, 1.5, 1.5])
+                b_action = b1.selectbox("Actie", ["✅ Voltooien", "↩️ Heropenen", "📅 Nieuwe deadline", "🏷️ Prioriteit", "🗑️ Verwijderen"], key="bulk_task_action")
+                b_value = None
+                if b_action == "📅 Nieuwe deadline": b_value = str(b2.date_input("Deadline", date.today(), key="bulk_task_deadline"))
+                elif b_action == "🏷️ Prioriteit": b_value = b2.selectbox("Prioriteit", ["🔥 Hoog", "⏺️ Midden", "💤 Laag"], key="bulk_task_prio")
+                if b3.button("Alles selecteren", key="bulk_task_all"):
+                    for t in disp: st.session_state[f"sel_task_{t['ID']}"] = True
+                    st.rerun()
+                if b4.button(f"Toepassen ({len(selected)})", key="bulk_task_apply", type="primary", disabled=not selected):
+                    if b_action == "🗑️ Verwijderen": bulk_update_tasks(selected, 'delete')
+                    elif b_action == "📅 Nieuwe deadline": bulk_update_tasks(selected, 'deadline', b_value)
+                    elif b_action == "🏷️ Prioriteit": bulk_update_tasks(selected, 'priority', b_value)
+                    else: bulk_update_tasks(selected, 'status', "TRUE" if b_action == "✅ Voltooien" else "FALSE")
+                    for tid in selected: st.session_state.pop(f"sel_task_{tid}", None)
+                    st.rerun()
+        # Vanuit de zoekbalk: die ene taak één keer opengeklapt tonen (en dus op de pagina)
+        t_focus = st.session_state.pop('task_focus', None)
+        # Per pagina, net als de kanban: elke taak heeft een eigen bewerkformulier
+        task_limit = st.session_state.get("task_limit", KANBAN_PAGE_SIZE)
+        f_pos = next((i for i, t in enumerate(disp) if t.get('ID') == t_focus), -1)
+        if f_pos >= task_limit: task_limit = st.session_state["task_limit"] = (f_pos // KANBAN_PAGE_SIZE + 1) * KANBAN_PAGE_SIZE
+        for t in disp[:task_limit]:
             if not t.get('ID'): continue
             done = str(t.get('Status')).upper() == 'TRUE'
             opac = "0.5" if done else "1.0"
@@ -804,7 +1504,8 @@ elif st.session_state['active_page'] == 'Projecten':
             with st.container(border=True):
                 c_chk, c_inf, c_met, c_del = st.columns([0.5, 5, 2.5, 0.5])
                 with c_chk:
-                    if st.checkbox("", value=done, key=f"chk_{t['ID']}") != done:
+                    if select_mode: st.checkbox("", key=f"sel_task_{t['ID']}")
+                    elif st.checkbox("", value=done, key=f"chk_{t['ID']}") != done:
                         toggle_task_status(t['ID'], str(t.get('Status')).upper()); st.rerun()
                 with c_inf:
                     kl = f"<span style='color:{THEME_COLOR};font-weight:bold'>{t.get('Klant')}</span> | " if k_filt == "Alle Projecten" else ""
@@ -819,7 +1520,7 @@ elif st.session_state['active_page'] == 'Projecten':
                     if st.button("🗑️", key=f"del_task_{t['ID']}"):
                         delete_single_task(t['ID'])
                         st.rerun()
-                with st.expander("✏️ Bewerk"):
+                with st.expander("✏️ Bewerk", expanded=t_focus == t['ID']):
                     with st.form(f"edit_{t['ID']}"):
                         e1, e2 = st.columns(2)
                         with e1:
@@ -835,7 +1536,11 @@ elif st.session_state['active_page'] == 'Projecten':
                         en = st.text_area("Notities", t.get('Notities', ''), key=f"en_{t['ID']}")
                         if st.form_submit_button("Opslaan"):
                             new_d = {'Klant': ek, 'Taak': et, 'Categorie': ec, 'Deadline': ed, 'Prioriteit': ep, 'Notities': en}
-                            update_task_data(t['ID'], new_d); st.success("Opgeslagen!"); st.rerun()
+                            update_task_data(t['ID'], new_d, base=t); st.success("Opgeslagen!"); st.rerun()
+        if len(disp) > task_limit:
+            if st.button(f"⬇️ Meer laden ({task_limit} van {len(disp)})", key="more_tasks", use_container_width=True):
+                st.session_state["task_limit"] = task_limit + KANBAN_PAGE_SIZE
+                st.rerun()
     st.divider()
     if st.button("🧹 Voltooide taken verwijderen", key="del_completed_tasks"):
         delete_completed_tasks(); st.success("Opgeruimd!"); st.rerun()
@@ -877,16 +1582,9 @@ elif st.session_state['active_page'] == 'Uren':
 
     st.divider()
     st.subheader("📅 Kalender Overzicht")
-    all_hours_data = load_hours()
-    calendar_events = []
-    if all_hours_data:
-        for h in all_hours_data:
-            try:
-                d_str = str(h.get('Datum', ''))
-                iso_date = pd.to_datetime(d_str, dayfirst=True).strftime('%Y-%m-%d')
-                evt = {"title": f"{h.get('Klant', '')} ({h.get('Uren', 0)}u)", "start": iso_date, "allDay": True, "backgroundColor": THEME_COLOR, "borderColor": THEME_COLOR}
-                calendar_events.append(evt)
-            except: continue
+    hours_version = data_version("Uren")
+    cal_month = st.session_state.setdefault('cal_month', date.today().replace(day=1).isoformat())
+    calendar_events = build_calendar_events(hours_version, *calendar_window(cal_month))
 
     calendar_options = {
         "headerToolbar": {
@@ -895,70 +1593,81 @@ elif st.session_state['active_page'] == 'Uren':
             "right": "dayGridMonth"
         },
         "initialView": "dayGridMonth",
+        "initialDate": cal_month,
         "selectable": True,
     }
     
-    if 'calendar' in globals():
-        calendar(events=calendar_events, options=calendar_options)
+    try: from streamlit_calendar import calendar
+    except ImportError: calendar = None; st.error("⚠️ Plugin mist. Voeg 'streamlit-calendar' toe aan requirements.txt")
+    if calendar:
+        cal_state = calendar(events=calendar_events, options=calendar_options, callbacks=["datesSet"], key="hours_calendar")
+        # Bladeren in de kalender: nieuw venster ophalen (midden van de weergave = de getoonde maand)
+        dates_set = (cal_state or {}).get('datesSet')
+        if dates_set:
+            start, end = pd.Timestamp(dates_set['start'][:10]), pd.Timestamp(dates_set['end'][:10])
+            shown = (start + (end - start) / 2).date().replace(day=1).isoformat()
+            if shown != cal_month:
+                st.session_state['cal_month'] = shown; st.rerun()
     
-    with st.expander("📜 Bekijk als Lijst & Download"):
-        hf = st.selectbox("🔍 Filter overzicht op klant:", ["Alle Klanten"] + all_companies, key="hour_overview_filter")
-        fh = [h for h in all_hours_data if h.get('Klant') == hf] if hf != "Alle Klanten" else all_hours_data
-        th = sum([float(h.get('Uren', 0)) for h in fh])
-        tm = sum([float(h.get('Totaal', 0)) for h in fh])
+    with st.expander("📜 Bekijk als Lijst & Download", expanded='hour_focus' in st.session_state):
+        ledger = hours_ledger(hours_version)
+        f1, f2 = st.columns(2)
+        with f1: hf = st.selectbox("🔍 Filter overzicht op klant:", ["Alle Klanten"] + all_companies, key="hour_overview_filter", on_change=lambda: st.session_state.pop('hour_page', None))
+        with f2:
+            # Standaard alles (ook regels zonder geldige datum); een periode kies je expliciet,
+            # zodat een bewaarde periode nieuwe regels niet ongemerkt wegfiltert
+            h_start = h_end = None
+            if not st.toggle("Alle datums", value=True, key="hour_overview_all", on_change=lambda: st.session_state.pop('hour_page', None)):
+                first, last = ledger['Dag'].min(), ledger['Dag'].max()
+                span = (first.date(), last.date()) if pd.notna(first) else (date.today(), date.today())
+                hr = st.date_input("📅 Periode:", span, key="hour_overview_range", on_change=lambda: st.session_state.pop('hour_page', None))
+                if isinstance(hr, (list, tuple)) and len(hr) == 2: h_start, h_end = hr
+        h_klant = hf if hf != "Alle Klanten" else None
+        days = hour_day_totals(hours_version)
+        day_sel = days[range_mask(days, h_klant, h_start, h_end)]
         m1, m2 = st.columns(2)
-        m1.metric("Totaal Uren (Selectie)", f"{th:.2f} uur")
-        m2.metric("Totale Waarde (Selectie)", f"€ {tm:,.2f}")
+        m1.metric("Totaal Uren (Selectie)", f"{day_sel['Uren'].sum():.2f} uur")
+        m2.metric("Totale Waarde (Selectie)", f"€ {day_sel['Totaal'].sum():,.2f}")
+        fh = ledger[range_mask(ledger, h_klant, h_start, h_end)]
         
-        if fh:
-            import io
-            df_export = pd.DataFrame(fh)
-            if not df_export.empty:
-                df_export = df_export[['Datum', 'Omschrijving', 'Uren', 'Tarief', 'Totaal']]
-                st.write("---")
-                st.write("📥 **Download Opties:**")
+        if not fh.empty:
+            st.write("---")
+            st.write("📥 **Download Opties:**")
+            # Pas opbouwen na een klik; daarna uit de cache zolang filter en data gelijk blijven
+            exp_args = (h_klant, h_start, h_end)
+            if st.session_state.get('hour_export_args') != exp_args:
+                if st.button("⚙️ Export voorbereiden", key="hour_export_prepare"):
+                    st.session_state['hour_export_args'] = exp_args; st.rerun()
+            else:
+                exp_klanten = (h_klant,) if h_klant else ()
                 c_csv, c_excel, c_empty = st.columns(3)
 
                 with c_csv:
-                    csv = df_export.to_csv(index=False).encode('utf-8')
+                    csv = export_hours(hours_version, 'csv', exp_klanten, h_start, h_end)
                     st.download_button(label="📄 Download als CSV", data=csv, file_name=f"Uren_{hf}_{date.today()}.csv", mime="text/csv")
 
                 with c_excel:
                     try:
-                        buffer = io.BytesIO()
-                        with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                            df_export.to_excel(writer, sheet_name='Specificatie', startrow=4, index=False, header=True)
-                            workbook = writer.book
-                            worksheet = writer.sheets['Specificatie']
-                            fmt_titel = workbook.add_format({'bold': True, 'font_size': 14, 'font_color': THEME_COLOR})
-                            fmt_header = workbook.add_format({'bold': True, 'bg_color': '#f0f0f0', 'border': 1})
-                            fmt_currency = workbook.add_format({'num_format': '€ #,##0.00'})
-                            fmt_date = workbook.add_format({'num_format': 'dd-mm-yyyy'})
-                            fmt_total = workbook.add_format({'bold': True, 'num_format': '€ #,##0.00', 'top': 6})
-                            
-                            worksheet.write(0, 0, "Urenspecificatie", fmt_titel)
-                            worksheet.write(1, 0, f"Klant: {hf}")
-                            worksheet.write(2, 0, f"Datum export: {date.today().strftime('%d-%m-%Y')}")
-                            
-                            worksheet.set_column('A:A', 12, fmt_date)
-                            worksheet.set_column('B:B', 50)
-                            worksheet.set_column('C:C', 8)
-                            worksheet.set_column('D:D', 10, fmt_currency)
-                            worksheet.set_column('E:E', 12, fmt_currency)
-                            
-                            for col_num, value in enumerate(df_export.columns.values):
-                                worksheet.write(4, col_num, value, fmt_header)
-                                
-                            last_row = len(df_export) + 5
-                            cell_range = f"E6:E{last_row}" 
-                            worksheet.write(last_row, 3, "TOTAAL:", fmt_header)
-                            worksheet.write_formula(last_row, 4, f"=SUM({cell_range})", fmt_total)
-
-                        st.download_button(label="📊 Download Factuurbijlage (Excel)", data=buffer, file_name=f"Specificatie_{hf}_{date.today()}.xlsx", mime="application/vnd.ms-excel")
+                        xlsx = export_hours(hours_version, 'xlsx', exp_klanten, h_start, h_end, label=hf)
+                        st.download_button(label="📊 Download Factuurbijlage (Excel)", data=xlsx, file_name=f"Specificatie_{hf}_{date.today()}.xlsx", mime=exports.XLSX_MIME)
                     except ImportError:
                         st.error("Installeer 'xlsxwriter' voor Excel export!")
 
-        for e in reversed(fh):
+        n_pages = max(1, -(-len(fh) // HOUR_PAGE_SIZE))
+        # Vanuit een zoekresultaat: naar de pagina met dat item springen
+        h_focus = st.session_state.pop('hour_focus', None)
+        if h_focus is not None:
+            hit_pos = fh.index[fh['ID'].astype(str) == str(h_focus)]
+            if len(hit_pos): st.session_state['hour_page'] = int(fh.index.get_loc(hit_pos[0])) // HOUR_PAGE_SIZE
+        page = min(st.session_state.get('hour_page', 0), n_pages - 1)
+        if n_pages > 1:
+            p1, p2, p3 = st.columns([1, 2, 1])
+            if p1.button("◀ Vorige", key="hour_page_prev", disabled=page == 0):
+                st.session_state['hour_page'] = page - 1; st.rerun()
+            p2.caption(f"Pagina {page + 1} van {n_pages} ({len(fh)} regels)")
+            if p3.button("Volgende ▶", key="hour_page_next", disabled=page >= n_pages - 1):
+                st.session_state['hour_page'] = page + 1; st.rerun()
+        for e in fh.iloc[page * HOUR_PAGE_SIZE:(page + 1) * HOUR_PAGE_SIZE].to_dict('records'):
             with st.container(border=True):
                 ca, cb, cc, cd = st.columns([1.5, 4, 1.5, 1])
                 with ca: st.caption(e.get('Datum', '')); st.write(f"**{e.get('Klant', '')}**")
@@ -969,6 +1678,27 @@ elif st.session_state['active_page'] == 'Uren':
                         delete_hour_entry(e.get('ID', ''))
                         st.rerun()
 
+    with st.expander("🧾 Bulk Export (Facturatie)"):
+        prev_end = date.today().replace(day=1) - pd.Timedelta(days=1)
+        maint_clients = sorted({l['name'] for col in ['col1', 'col2', 'col3', 'col4'] for l in st.session_state['leads_data'][col] if l.get('maintenance')})
+        if st.checkbox(f"Alle klanten met onderhoudscontract ({len(maint_clients)})", key="bulk_maint"): b_klanten = maint_clients
+        else: b_klanten = st.multiselect("Klanten:", all_companies, key="bulk_clients")
+        b_range = st.date_input("📅 Periode:", (prev_end.replace(day=1), prev_end), key="bulk_range")
+        b_mode = st.radio("Formaat:", ["ZIP (werkboek per klant)", "Eén werkboek (tabblad per klant)"], key="bulk_mode", horizontal=True)
+        if b_klanten and isinstance(b_range, (list, tuple)) and len(b_range) == 2:
+            b_args = ('zip' if b_mode.startswith("ZIP") else 'book', tuple(sorted(b_klanten)), b_range[0], b_range[1])
+            if st.session_state.get('bulk_export_args') != b_args:
+                if st.button("📦 Maak bulk export", key="bulk_export"):
+                    st.session_state['bulk_export_args'] = b_args; st.rerun()
+            else:
+                try:
+                    data = export_hours(hours_version, *b_args)
+                    stamp = f"{b_range[0]}_{b_range[1]}"
+                    if b_args[0] == 'zip': st.download_button("⬇️ Download ZIP", data=data, file_name=f"Specificaties_{stamp}.zip", mime="application/zip")
+                    else: st.download_button("⬇️ Download Werkboek", data=data, file_name=f"Specificaties_{stamp}.xlsx", mime=exports.XLSX_MIME)
+                except ImportError:
+                    st.error("Installeer 'xlsxwriter' voor Excel export!")
+
 # ================= PAGINA 5: INSPIRATIE =================
 elif st.session_state['active_page'] == 'Inspiratie':
     st.title("💡 Inspiratie Wall")
@@ -1034,3 +1764,36 @@ elif st.session_state['active_page'] == 'Inspiratie':
                 if c_del.button("🗑️", key=f"del_insp_{insp_id}", use_container_width=True):
                     delete_inspiration(insp_id)
                     st.rerun()
+
+# Laadtijd van deze pagina (begin script tot hier), voor het rapport in het debug paneel
+record_screen_time(st.session_state['active_page'])
+
+# ================= 🐞 API DEBUG PANEEL (verborgen) =================
+# Zichtbaar met ?debug=1 in de URL of de setting debug_panel = true
+if st.query_params.get("debug") == "1" or str(get_setting("debug_panel", "false")).lower() == "true":
+    with st.sidebar:
+        with st.expander("🐞 API"):
+            rec = get_api_recorder()
+            rec.measure_bytes = True  # vanaf nu (voor het hele proces) ook payload-groottes meten
+            rerun_events = rec.get_events(rerun=rec.context()['rerun'])
+            session_events = rec.get_events(session=st.session_state['session_id'])
+            st.caption(f"Deze rerun: {sum(1 for e in rerun_events if e['method'] != 'retry_sleep')} calls · {sum(e['duration'] for e in rerun_events):.2f}s · {sum(e['bytes_received'] for e in rerun_events) / 1024:.0f} kB in")
+            if rerun_events: st.dataframe(pd.DataFrame(rec.summarize(rerun_events, 'tab', 'method')), hide_index=True)
+            st.caption(f"Sessie: {len(session_events)} events")
+            if session_events:
+                st.dataframe(pd.DataFrame(rec.summarize(session_events, 'page')), hide_index=True)
+                st.dataframe(pd.DataFrame(rec.summarize(session_events, 'tab', 'method')), hide_index=True)
+            bg_events = rec.get_events(session='background')
+            if bg_events: st.caption(f"Achtergrond: {len(bg_events)} events")
+            sched = get_scheduler().stats()
+            st.caption(f"🚦 Scheduler: {sched['calls']} calls · {sched['throttled']}× 429 · {sched['server_errors']}× 5xx/netwerk · {sched['queued']}× gewacht ({sched['queue_time']:.1f}s)")
+            ct = get_change_tracker()
+            st.caption(f"🔍 Wijzigingsdetectie: {ct['skipped']}× ongewijzigd gehouden · {ct['refetched']}× opnieuw opgehaald")
+            cl = get_conflict_log()
+            st.caption(f"🤝 Gelijktijdige writes: {cl['rebased']}× samengevoegd · {cl['skipped']}× overgeslagen")
+            st.caption("🗄️ Gedeelde store: " + " · ".join(f"{t} v{store_version(t)} ({ct['loads'].get(t, 0)}× geladen)" for t in WORKING_COPY_TABS))
+            st.caption("⏱️ Laadtijden per scherm (ms; koud = eerste run van dit proces)")
+            st.dataframe(get_startup_log().summary(), hide_index=True)
+            if IMPORT_TIMES: st.caption("Luie imports: " + " · ".join(f"{m} {t * 1000:.0f} ms" for m, t in IMPORT_TIMES.items()))
+            st.download_button("⬇️ JSON", rec.to_json(session_events + bg_events), file_name="api_calls.json", mime="application/json")
+            st.download_button("⬇️ CSV", rec.to_csv(session_events + bg_events), file_name="api_calls.csv", mime="text/csv")
@@ -0,0 +1,39 @@
+import os
+import sys
+
+# Modules staan plat in de root van de repo
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import storage
+
+APP_PATH = os.path.join(REPO_DIR, "streamlit_app.py")
+TAB_HEADERS = {
+    'Sheet1': ['Status', 'Bedrijf', 'Prijs', 'Contact', 'Email', 'Telefoon', 'Website', 'Projectmap', 'Notities', 'Onderhoud', 'ID'],
+    'Taken': ['Status', 'Klant', 'Taak', 'Categorie', 'Deadline', 'Prioriteit', 'Notities', 'ID'],
+    'Uren': ['Datum', 'Klant', 'Uren', 'Omschrijving', 'Tarief', 'Totaal', 'ID'],
+    'Inspiratie': ['Naam', 'URL', 'Notitie', 'Tag', 'ID'],
+}
+
+
+@pytest.fixture
+def make_app(monkeypatch):
+    # App tegen een lokale backend in het geheugen, synchroon schrijven, al ingelogd
+    def factory(**tabs):
+        backend = storage.LocalBackend(None)
+        for name, headers in TAB_HEADERS.items(): backend.add_worksheet(name, [headers] + tabs.get(name, []))
+        key = f"test-{id(backend)}"
+        storage.LOCAL_BACKENDS[key] = backend
+        monkeypatch.setenv("CRM_STORAGE_BACKEND", "local")
+        monkeypatch.setenv("CRM_LOCAL_STORE_PATH", key)
+        monkeypatch.setenv("CRM_WRITE_BEHIND", "false")
+        st.cache_data.clear(); st.cache_resource.clear()
+        at = AppTest.from_file(APP_PATH, default_timeout=60)
+        at.secrets["passwords"] = {"mijn_wachtwoord": "test"}
+        at.session_state["password_correct"] = True
+        return at, backend
+    return factory
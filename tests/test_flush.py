@@ -0,0 +1,60 @@
+import threading
+import time
+
+
+def task(tid, status="FALSE"):
+    return [status, "Bakker", "Logo maken", "Design", "2024-01-05", "⏺️ Midden", "", tid]
+
+
+def wait_for(check, timeout=10):
+    end = time.time() + timeout
+    while time.time() < end:
+        if check(): return True
+        time.sleep(0.05)
+    return False
+
+
+def test_transient_error_opening_tab_is_retried(make_app, monkeypatch):
+    at, backend = make_app(Sheet1=[["Te benaderen", "Bakker", "", "", "", "", "", "", "", "FALSE", "l1"]], Taken=[task("t1")])
+    monkeypatch.setenv("CRM_WRITE_BEHIND", "true")
+    monkeypatch.setenv("CRM_WRITE_MIN_INTERVAL", "0")
+    # Eén netwerkfout bij het openen van het tabblad vanuit de write-behind thread
+    opened, failures = backend.worksheet, []
+    def flaky_worksheet(name):
+        if threading.current_thread().name == "sheets-write-behind" and not failures:
+            failures.append(name); raise ConnectionError("netwerk weg")
+        return opened(name)
+    monkeypatch.setattr(backend, "worksheet", flaky_worksheet)
+
+    at.session_state["active_page"] = "Projecten"
+    at.run()
+    at.checkbox(key="chk_t1").check().run()
+    assert wait_for(lambda: backend.worksheet("Taken").get_all_values()[1][0] == "TRUE")
+    assert failures == ["Taken"]
+    at.run()
+    assert not at.exception
+    assert not [c for c in at.sidebar.caption if "niet opgeslagen" in str(c.value)]
+
+
+def test_append_that_landed_before_an_error_is_not_duplicated(make_app, monkeypatch):
+    import storage
+    at, backend = make_app(Sheet1=[["Te benaderen", "Bakker", "", "", "", "", "", "", "", "FALSE", "l1"]])
+    monkeypatch.setenv("CRM_WRITE_BEHIND", "true")
+    monkeypatch.setenv("CRM_WRITE_MIN_INTERVAL", "0")
+    # De rij komt aan, maar het antwoord niet (time-out): de write is niet zomaar te herhalen
+    append, failures = storage.LocalWorksheet.append_rows, []
+    def lost_reply(self, values, **kwargs):
+        append(self, values, **kwargs)
+        if not failures: failures.append(values); raise TimeoutError("geen antwoord")
+    monkeypatch.setattr(storage.LocalWorksheet, "append_rows", lost_reply)
+
+    at.session_state["active_page"] = "Inspiratie"
+    at.run()
+    next(t for t in at.text_input if t.label.startswith("Naam")).input("Mooie site")
+    next(t for t in at.text_input if t.label.startswith("URL")).input("www.mooi.nl")
+    next(b for b in at.button if b.label == "💾 Opslaan").click().run()
+    # Tweede poging: rij op ID gevonden -> update in plaats van nog een append
+    assert wait_for(lambda: backend.get_stats()['methods'].get('batch_update', 0) >= 1)
+    names = [r[0] for r in backend.worksheet("Inspiratie").get_all_values()[1:]]
+    assert failures and names == ["Mooie site"]
+    assert backend.get_stats()['methods'].get('col_values', 0) >= 1  # opgezocht in de Sheet, niet in een index
@@ -0,0 +1,31 @@
+def hour(datum, klant="Bakker", uren=1.0, hid="h1"):
+    return [datum, klant, uren, "Werk", 30, uren * 30, hid]
+
+
+def test_uren_page_renders_month_without_entries(make_app):
+    at, _ = make_app(Sheet1=[["Te benaderen", "Bakker", "", "", "", "", "", "", "", "FALSE", "l1"]], Uren=[hour("2024-01-05")])
+    at.session_state["active_page"] = "Uren"
+    at.session_state["cal_month"] = "1990-01-01"
+    at.run()
+    assert not at.exception
+
+
+def selection_total(at):
+    return next(m.value for m in at.metric if m.label == "Totaal Uren (Selectie)")
+
+
+def test_ledger_totals_follow_new_and_undated_entries(make_app):
+    from datetime import date
+    at, _ = make_app(Sheet1=[["Te benaderen", "Bakker", "", "", "", "", "", "", "", "FALSE", "l1"]],
+                     Uren=[hour("2024-01-05", uren=1.0, hid="h1"), hour("onbekend", uren=2.0, hid="h2")])
+    at.session_state["active_page"] = "Uren"
+    at.run()
+    assert selection_total(at) == "3.00 uur"
+
+    # Nieuwe regel van vandaag: moet in de selectie komen, ook na de eerste render
+    at.session_state["hour_queue"] = [{"klant": "Bakker", "datum": date.today(), "uren": 1.5, "desc": "Nieuw"}]
+    at.run()
+    next(b for b in at.button if str(b.label).startswith("💾 Alles Opslaan")).click().run()
+    at.run()
+    assert not at.exception
+    assert selection_total(at) == "4.50 uur"
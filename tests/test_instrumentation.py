@@ -0,0 +1,25 @@
+import instrumentation
+from instrumentation import ApiRecorder, InstrumentedWorksheet
+from storage import LocalBackend
+
+
+def test_payload_sizes_only_measured_when_enabled(monkeypatch):
+    backend = LocalBackend(None)
+    backend.add_worksheet("Taken", [["Taak", "ID"], ["Bellen", "t1"]])
+    rec = ApiRecorder()
+    sizes = []
+    monkeypatch.setattr(instrumentation, "payload_size", lambda obj: sizes.append(obj) or 10)
+    ws = InstrumentedWorksheet(backend.worksheet("Taken"), rec, "Taken")
+    ws.get_all_values()
+    assert not sizes and rec.get_events()[-1]['bytes_received'] == 0
+    assert backend.get_stats()['bytes_received'] == 0
+    rec.measure_bytes = True
+    ws.update_cell(2, 1, "Mailen")
+    assert rec.get_events()[-1]['bytes_sent'] == 10 and sizes == [(2, 1, "Mailen")]
+
+
+def test_local_backend_counts_bytes_for_benchmarks():
+    backend = LocalBackend(None, measure_bytes=True)
+    backend.add_worksheet("Taken", [["Taak", "ID"], ["Bellen", "t1"]])
+    backend.worksheet("Taken").get_all_values()
+    assert backend.get_stats()['bytes_received'] > 0
@@ -0,0 +1,23 @@
+import time
+
+from sqlite_mirror import SheetMirror
+
+
+def test_sync_only_fetches_when_stamp_changes_or_tab_is_dirty():
+    mirror = SheetMirror(":memory:")
+    fetched, stamp = [], {'value': 1}
+    def fetch(tab):
+        fetched.append(tab)
+        return [{'Klant': 'Bakker', 'ID': f"{tab}-1"}]
+    mirror.start_sync(["Taken", "Uren"], fetch, interval=0.02, stamp=lambda: stamp['value'])
+    time.sleep(0.2)
+    assert sorted(fetched) == ["Taken", "Uren"]  # eerste ronde, daarna ongewijzigd
+
+    mirror.mark_dirty("Taken")
+    time.sleep(0.2)
+    assert sorted(fetched) == ["Taken", "Taken", "Uren"]
+
+    stamp['value'] = 2
+    time.sleep(0.2)
+    assert sorted(fetched) == ["Taken", "Taken", "Taken", "Uren", "Uren"]
+    assert mirror.get_records("Uren", Klant="Bakker") == [{'Klant': 'Bakker', 'ID': "Uren-1"}]
@@ -0,0 +1,45 @@
+def lead(status, naam, lid, onderhoud=""):
+    return [status, naam, "", "", "", "", "", "", "", onderhoud, lid]
+
+
+def sheet_rows(backend):
+    return {r[-1]: r for r in backend.worksheet("Sheet1").get_all_values()[1:]}
+
+
+def test_legacy_statuses_move_and_delete_without_conflicts(make_app):
+    # Oude statuswaarden en een lege Onderhoud mogen niet als wijziging door een ander gelden
+    at, backend = make_app(Sheet1=[lead("Prullenbak", "Weg BV", "l1"), lead("1e mail", "Mail BV", "l2"), lead("Nieuw", "Nieuw BV", "l3", "TRUE")])
+    at.session_state["active_page"] = "Pipeline"
+    at.run()
+
+    at.button(key="r_l2").click().run()
+    assert sheet_rows(backend)["l2"][0] == "Geen interesse"
+    assert not [t for t in at.toast if "⚠️" in str(t.value)]
+    at.button(key="r_l3").click().run()
+    assert sheet_rows(backend)["l3"][0] == "Opgevolgd"
+
+    next(b for b in at.button if b.label == "🚨 Prullenbak Definitief Legen").click().run()
+    assert not [t for t in at.toast if "⚠️" in str(t.value)]
+    rows = sheet_rows(backend)
+    assert "l1" not in rows and set(rows) == {"l2", "l3"}
+    assert rows["l3"][9] == "TRUE"
+    assert not at.exception
+
+
+def test_concurrent_edit_is_rebased(make_app):
+    at, backend = make_app(Sheet1=[lead("Opgevolgd", "Mail BV", "l2"), lead("Te benaderen", "Nieuw BV", "l3")])
+    at.session_state["active_page"] = "Pipeline"
+    at.run()
+    # Een ander schrijft na het laden: notitie bij l2, status bij l3
+    sheet = backend.worksheet("Sheet1")
+    sheet.update_cell(2, 9, "Bellen dinsdag")
+    sheet.update_cell(3, 1, "Geland 🎉")
+
+    at.button(key="r_l2").click().run()  # andere kolom: beide wijzigingen blijven staan
+    rows = sheet_rows(backend)
+    assert rows["l2"][0] == "Geen interesse" and rows["l2"][8] == "Bellen dinsdag"
+    assert not [t for t in at.toast if "⚠️" in str(t.value)]
+
+    at.button(key="r_l3").click().run()  # zelfde kolom: onze waarde wint, met melding
+    assert sheet_rows(backend)["l3"][0] == "Opgevolgd"
+    assert [t for t in at.toast if "Tegelijk gewijzigd" in str(t.value) and "Status" in str(t.value)]
@@ -0,0 +1,27 @@
+from datetime import date
+
+from sqlite_mirror import SheetMirror
+from storage import records_from_values
+
+
+def hours_metric(at):
+    return next(m.value for m in at.metric if str(m.label).startswith("Gewerkte Uren"))
+
+
+def test_refresh_of_mirror_sourced_tab_updates_dashboard(make_app, monkeypatch, tmp_path):
+    today = date.today().isoformat()
+    at, backend = make_app(Sheet1=[["Te benaderen", "Bakker", "", "", "", "", "", "", "", "FALSE", "l1"]],
+                           Uren=[[today, "Bakker", 2, "Werk", 30, 60, "h1"]])
+    # Spiegel al gevuld (zoals na een herstart): Uren komt dan uit de spiegel, niet uit de Sheet
+    path = str(tmp_path / "mirror.db")
+    SheetMirror(path).replace_tab("Uren", records_from_values(backend.worksheet("Uren").get_all_values()))
+    monkeypatch.setenv("CRM_SQLITE_MIRROR_PATH", path)
+    monkeypatch.setenv("CRM_MIRROR_SYNC_INTERVAL", "3600")
+    at.session_state["active_page"] = "Dashboard"
+    at.run()
+    assert hours_metric(at) == "2.0 uur"
+
+    backend.worksheet("Uren").update_cell(2, 3, 5)  # een ander past de Sheet aan
+    next(b for b in at.sidebar.button if b.label == "🔄").click().run()
+    assert not at.exception
+    assert hours_metric(at) == "5.0 uur"
@@ -0,0 +1,71 @@
+import random
+import time
+
+import pytest
+
+from scheduler import RequestScheduler, TokenBucket, is_retryable
+
+
+class ApiError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.response = type("Response", (), {"status_code": status})()
+
+
+class ConnectTimeout(ConnectionError):
+    pass
+
+
+def flaky(*errors):
+    calls = []
+    def fn():
+        calls.append(1)
+        if len(calls) <= len(errors): raise errors[len(calls) - 1]
+        return "ok"
+    return fn, calls
+
+
+def test_token_bucket_paces_after_burst():
+    s = RequestScheduler(read_per_minute=600, burst=2)  # 10 per seconde
+    t0 = time.monotonic()
+    for _ in range(5): s.acquire('read')
+    # 2 uit de burst, 3 op tempo: ~0.3 s
+    assert 0.25 <= time.monotonic() - t0 < 1.0
+
+
+def test_unlimited_bucket_never_waits():
+    assert TokenBucket(0).wait_time() == 0.0
+    assert RequestScheduler(read_per_minute=0).acquire('read') == 0.0
+
+
+def test_backoff_is_full_jitter_within_cap():
+    random.seed(3)
+    s = RequestScheduler(base_delay=0.5, max_delay=4.0)
+    for attempt in range(10):
+        delays = [s.backoff(attempt) for _ in range(50)]
+        assert all(0 <= d <= min(4.0, 0.5 * 2 ** attempt) for d in delays)
+    assert max(s.backoff(9) for _ in range(200)) > 2.0  # jitter spreidt tot aan de cap
+
+
+@pytest.mark.parametrize("error, kind, retried", [
+    (ApiError(429), 'read', True), (ApiError(503), 'read', True), (ConnectionError(), 'read', True), (TimeoutError(), 'read', True),
+    (ApiError(400), 'read', False), (ApiError(404), 'read', False), (ValueError(), 'read', False),
+    # Writes: alleen als zeker is dat er niets is aangekomen
+    (ApiError(429), 'write', True), (ConnectTimeout(), 'write', True), (ConnectionRefusedError(), 'write', True),
+    (ApiError(503), 'write', False), (ConnectionError(), 'write', False), (TimeoutError(), 'write', False), (ApiError(400), 'write', False),
+])
+def test_retryable_split(error, kind, retried):
+    assert is_retryable(error, kind) is retried
+    s = RequestScheduler(read_per_minute=0, write_per_minute=0, base_delay=0.001)
+    fn, calls = flaky(error)
+    if retried: assert s.run(kind, fn) == "ok" and len(calls) == 2
+    else:
+        with pytest.raises(type(error)): s.run(kind, fn)
+        assert len(calls) == 1
+
+
+def test_gives_up_after_max_retries():
+    s = RequestScheduler(read_per_minute=0, max_retries=2, base_delay=0.001)
+    fn, calls = flaky(*[ApiError(500)] * 5)
+    with pytest.raises(ApiError): s.run('read', fn)
+    assert len(calls) == 3 and s.stats()['gave_up'] == 1 and s.stats()['retries'] == 2
@@ -0,0 +1,38 @@
+from search_index import SearchIndex
+
+
+def docs(n):
+    return [('task', f"t{i}", f"Taak {i}", "Bakker", ["Bakker", f"06-{i:08d}"], "Bakker") for i in range(n)]
+
+
+def test_load_matches_incremental_add():
+    bulk, inc = SearchIndex(), SearchIndex()
+    bulk.load(docs(50))
+    for d in docs(50): inc.add(*d)
+    assert bulk.vocab == inc.vocab
+    assert bulk.search("taak 1", limit=5) == inc.search("taak 1", limit=5)
+    bulk.load(docs(3), 'task')
+    assert len(bulk.docs) == 3 and bulk.vocab == sorted(bulk.postings)
+
+
+def test_short_prefix_is_capped(monkeypatch):
+    import search_index
+    monkeypatch.setattr(search_index, "PREFIX_LIMIT", 10)
+    idx = SearchIndex()
+    idx.load(docs(100))
+    assert len(idx._prefix_matches("06", 10)) == 10
+    assert len(idx.search("06", limit=50)) == 10
+    assert [d['id'] for d in idx.search("taak 42")] == ["t42"]
+
+
+def test_search_finds_leads_and_tasks(make_app):
+    at, _ = make_app(Sheet1=[["Te benaderen", "Bakkerij Jansen", "", "José", "", "0612345678", "", "", "", "FALSE", "l1"]],
+                     Taken=[["FALSE", "Bakkerij Jansen", "Logo maken", "Design", "2024-01-05", "🔥 Hoog", "", "t1"]])
+    at.run()
+    at.text_input(key="global_search").set_value("jose").run()
+    assert any("Bakkerij Jansen" in str(b.label) for b in at.button)
+    at.text_input(key="global_search").set_value("logo").run()
+    next(b for b in at.button if "Logo maken" in str(b.label)).click().run()
+    assert not at.exception
+    assert at.session_state["active_page"] == "Projecten"
+    assert "task_focus" not in at.session_state
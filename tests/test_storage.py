@@ -0,0 +1,72 @@
+import pytest
+
+from storage import LocalBackend, StorageBackend, numericise, records_from_values
+
+
+def test_add_worksheet_stores_cells_as_sheet_text():
+    backend = LocalBackend(None)
+    backend.add_worksheet("Uren", [["Datum", "Uren", "Totaal", "ID"], ["2024-01-01", 1.5, 45.0, "hour-1"]])
+    assert backend.worksheet("Uren").get_all_values()[1] == ["2024-01-01", "1.5", "45", "hour-1"]
+    assert backend.worksheet("Uren").get_all_records() == [{"Datum": "2024-01-01", "Uren": 1.5, "Totaal": 45, "ID": "hour-1"}]
+
+
+def test_numericise_leaves_non_text_alone():
+    assert numericise(1.5) == 1.5 and numericise(None) is None and numericise("12") == 12
+    assert records_from_values([["A", "B"], [3, "x_1"]]) == [{"A": 3, "B": "x_1"}]
+
+
+@pytest.mark.parametrize("value", ["1,050", "2,000.1", "1,5", "1.5", "12", "-3", "1e3", "", " 7 ", "3_2", "06-12345678", "€ 1.050", "TRUE", None, 4.5])
+def test_numericise_matches_gspread(value):
+    gspread_utils = pytest.importorskip("gspread.utils")
+    assert numericise(value) == gspread_utils.numericise(value)
+    assert type(numericise(value)) is type(gspread_utils.numericise(value))
+
+
+class ApiError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.response = type("Response", (), {"status_code": status})()
+
+
+class FakeClient:
+    # Genoeg van een gspread client: open_by_key -> spreadsheet met worksheets()
+    def __init__(self, opens, fail_open=None):
+        self.opens, self.fail_open = opens, fail_open
+
+    def open_by_key(self, key):
+        self.opens.append(key)
+        if self.fail_open: raise self.fail_open
+        ws = type("Worksheet", (), {"title": "Taken"})()
+        return type("Spreadsheet", (), {"worksheets": lambda _self: [ws]})()
+
+
+def sheets_backend(clients):
+    from scheduler import RequestScheduler, is_stale_handle, method_kind
+    from storage import SheetsBackend
+    holder = {}
+    sched = RequestScheduler(read_per_minute=0, write_per_minute=0, on_error=lambda e: is_stale_handle(e) and holder['backend'].invalidate())
+    backend = holder['backend'] = SheetsBackend(lambda: clients.pop(0), "CRM", key="k", api_call=lambda m, fn, *a: sched.run(method_kind(m), lambda: fn(*a)))
+    return backend, sched
+
+
+def test_sheets_handles_are_rebuilt_after_auth_error():
+    opens = []
+    backend, sched = sheets_backend([FakeClient(opens), FakeClient(opens)])
+    ws = backend.worksheet("Taken")
+    assert backend.worksheet("Taken") is ws and len(opens) == 1  # gecachet
+    def expired(): raise ApiError(401)
+    with pytest.raises(ApiError): sched.run('read', expired)
+    assert backend.worksheet("Taken") is not ws and len(opens) == 2
+
+
+def test_not_found_while_opening_invalidates_without_deadlock():
+    opens = []
+    backend, _ = sheets_backend([FakeClient(opens, fail_open=ApiError(404)), FakeClient(opens)])
+    with pytest.raises(ApiError): backend.worksheet("Taken")
+    assert backend.spreadsheet is None
+    assert backend.worksheet("Taken").title == "Taken" and len(opens) == 2
+
+
+def test_backend_without_worksheet_cannot_be_created():
+    class Incomplete(StorageBackend): pass
+    with pytest.raises(TypeError): Incomplete()
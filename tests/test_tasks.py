@@ -0,0 +1,14 @@
+def task(i, status="FALSE"):
+    return [status, "Bakker", f"Taak {i}", "Design", f"2024-01-{i % 28 + 1:02d}", "⏺️ Midden", "", f"t{i}"]
+
+
+def test_task_list_pages_and_keeps_focused_task_visible(make_app):
+    at, _ = make_app(Sheet1=[["Te benaderen", "Bakker", "", "", "", "", "", "", "", "FALSE", "l1"]], Taken=[task(i) for i in range(60)])
+    at.session_state["active_page"] = "Projecten"
+    at.session_state["task_focus"] = "t13"  # deadline halverwege -> buiten de eerste pagina
+    at.run()
+    assert not at.exception
+    shown = {c.key for c in at.checkbox if str(c.key).startswith("chk_")}
+    assert "chk_t13" in shown and len(shown) < 60
+    next(b for b in at.button if str(b.label).startswith("⬇️ Meer laden")).click().run()
+    assert len({c.key for c in at.checkbox if str(c.key).startswith("chk_")}) > len(shown)
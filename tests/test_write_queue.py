@@ -0,0 +1,109 @@
+import time
+
+from write_queue import WriteBehindQueue, merge_ops, rebase_op
+
+
+def make_queue(flush_fn):
+    return WriteBehindQueue(flush_fn, debounce=0.01, min_interval=0.0)
+
+
+def test_permanent_error_is_dropped_not_retried():
+    calls = []
+    def flush(batch):
+        calls.append(batch)
+        raise RuntimeError("Tabblad 'Weg' niet gevonden")
+    q = make_queue(flush)
+    q.submit([{'tab': 'Weg', 'id': 'a', 'kind': 'delete', 'origin': 's1'}])
+    assert q.wait_idle(5)
+    time.sleep(0.1)
+    status = q.status()
+    assert len(calls) == 1
+    assert status['state'] == 'dropped' and status['pending'] == 0
+    assert status['dropped'][0]['ops'] == [{'tab': 'Weg', 'id': 'a', 'kind': 'delete', 'origin': 's1'}]
+
+
+def test_retryable_error_goes_back_on_the_queue():
+    calls = []
+    def flush(batch):
+        calls.append(batch)
+        if len(calls) == 1: raise ConnectionError("netwerk weg")
+    q = make_queue(flush)
+    q.submit([{'tab': 'Taken', 'id': 'a', 'kind': 'delete'}])
+    assert q.wait_idle(10)
+    assert len(calls) == 2
+    assert q.status()['state'] == 'idle' and not q.status()['dropped']
+
+
+def test_stale_handle_error_is_retried():
+    class Unauthorized(Exception):
+        code = 401
+    calls = []
+    def flush(batch):
+        calls.append(batch)
+        if len(calls) == 1: raise Unauthorized("token verlopen")
+    q = make_queue(flush)
+    q.submit([{'tab': 'Taken', 'id': 'a', 'kind': 'delete'}])
+    assert q.wait_idle(10)
+    assert len(calls) == 2 and not q.status()['dropped']
+
+
+# --- REBASE EN SAMENVOEGEN ---
+BASE = {1: "FALSE", 2: "Bakker", 3: "Logo", 4: "t1"}
+
+
+def upsert(status="FALSE", klant="Bakker", taak="Logo", base=BASE):
+    op = {'tab': 'Taken', 'id': 't1', 'kind': 'upsert', 'row': [status, klant, taak, "t1"], 'row_hint': 2}
+    if base is not None: op['base'] = dict(base)
+    return op
+
+
+def test_rebase_keeps_op_when_row_is_unchanged():
+    op = upsert(taak="Logo v2")
+    assert rebase_op(op, ["false", "Bakker", "Logo", "t1"]) == (op, [])  # 'false' == 'FALSE'
+
+
+def test_rebase_merges_non_conflicting_edit():
+    # Een ander zette de taak op klaar; wij wijzigden de omschrijving -> alleen onze kolom schrijven
+    new_op, conflicts = rebase_op(upsert(taak="Logo v2"), ["TRUE", "Bakker", "Logo", "t1"])
+    assert conflicts == []
+    assert new_op['kind'] == 'cells' and new_op['cells'] == {3: "Logo v2"} and 'row' not in new_op
+    assert new_op['row_hint'] == 2
+
+
+def test_rebase_reports_same_field_conflict_and_keeps_our_value():
+    new_op, conflicts = rebase_op(upsert(taak="Logo v2"), ["FALSE", "Bakker", "Huisstijl", "t1"])
+    assert conflicts == [3] and new_op['cells'] == {3: "Logo v2"}
+    # Zelfde nieuwe waarde aan beide kanten is geen conflict
+    assert rebase_op(upsert(taak="Logo v2"), ["FALSE", "Bakker", "Logo v2", "t1"])[1] == []
+
+
+def test_rebase_drops_ops_on_rows_deleted_remotely():
+    assert rebase_op(upsert(taak="Logo v2"), None) == (None, [])
+    delete = {'tab': 'Taken', 'id': 't1', 'kind': 'delete', 'base': {1: "TRUE"}}
+    assert rebase_op(delete, None) == (None, [])
+    # Delete van een rij die een ander intussen heeft heropend: overslaan
+    assert rebase_op(delete, ["FALSE", "Bakker", "Logo", "t1"]) == (None, [1])
+
+
+def test_rebase_without_base_is_unconditional():
+    op = upsert(base=None)
+    assert rebase_op(op, None) == (op, [])
+
+
+def test_merge_upsert_then_cells_becomes_one_upsert():
+    merged = merge_ops(upsert(), {'tab': 'Taken', 'id': 't1', 'kind': 'cells', 'cells': {1: "TRUE", 6: "x"}, 'base': {1: "TRUE"}})
+    assert merged['kind'] == 'upsert' and 'cells' not in merged
+    assert merged['row'] == ["TRUE", "Bakker", "Logo", "t1", "", "x"]
+    assert merged['base'] == BASE and merged['row_hint'] == 2  # oudste blik op de rij telt
+
+
+def test_merge_cells_then_cells_and_upsert_then_delete():
+    a = {'tab': 'Taken', 'id': 't1', 'kind': 'cells', 'cells': {1: "TRUE"}, 'base': {1: "FALSE"}}
+    b = {'tab': 'Taken', 'id': 't1', 'kind': 'cells', 'cells': {3: "Logo v2"}, 'base': {3: "Logo"}}
+    assert merge_ops(a, b)['cells'] == {1: "TRUE", 3: "Logo v2"} and merge_ops(a, b)['base'] == {1: "FALSE", 3: "Logo"}
+    deleted = merge_ops(upsert(), {'tab': 'Taken', 'id': 't1', 'kind': 'delete'})
+    assert deleted['kind'] == 'delete' and deleted['base'] == BASE and deleted['row_hint'] == 2
+    # Nieuwe, nog niet weggeschreven rij meteen weer weg: delete zonder base
+    assert 'base' not in merge_ops(upsert(base=None), {'tab': 'Taken', 'id': 't1', 'kind': 'delete', 'base': {1: "FALSE"}})
+    # Cellen na een delete veranderen niets
+    assert merge_ops({'tab': 'Taken', 'id': 't1', 'kind': 'delete'}, b)['kind'] == 'delete'
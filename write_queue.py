@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import deque
+
+from scheduler import is_retryable, is_stale_handle
+
+
+# ==========================================
+# ✍️ WRITE-BEHIND WACHTRIJ VOOR SHEETS MUTATIES
+# ==========================================
+# Een mutatie is een dict met 'tab', 'id' en 'kind':
+#   upsert -> hele rij ('row'); bijwerken als het ID bestaat, anders toevoegen
+#   cells  -> losse kolommen ('cells': {kolomnummer: waarde})
+#   delete -> rij met dit ID verwijderen
+# Optioneel 'base': {kolomnummer: waarde} zoals de schrijver de rij zag (zie rebase_op).
+# Mutaties op dezelfde (tab, id) worden samengevoegd tot één.
+def merge_ops(old, new):
+    merged = dict(new)
+    for k in ('row_hint', 'match', 'recheck'):
+        if k in old and k not in merged: merged[k] = old[k]
+    # De oudste blik op de rij telt; zonder base in de oude op (bv. een nieuwe rij) ook geen base
+    if 'base' in old: merged['base'] = {**new.get('base', {}), **old['base']}
+    else: merged.pop('base', None)
+    if new['kind'] == 'cells':
+        if old['kind'] == 'delete': return old
+        if old['kind'] == 'upsert':
+            row = list(old['row'])
+            for col, val in new['cells'].items():
+                while len(row) < col: row.append('')
+                row[col - 1] = val
+            merged.update({'kind': 'upsert', 'row': row})
+            merged.pop('cells', None)
+        elif old['kind'] == 'cells':
+            merged['cells'] = {**old['cells'], **new['cells']}
+    return merged
+
+
+def same_value(a, b):
+    # Sheet-waarden vergelijken zoals de gebruiker ze ziet: 1500 == "1500", "true" == "TRUE"
+    a, b = str('' if a is None else a).strip(), str('' if b is None else b).strip()
+    if a == b or a.upper() == b.upper() in ('TRUE', 'FALSE'): return True
+    try: return float(a) == float(b)
+    except ValueError: return False
+
+
+def rebase_op(op, current):
+    # Optimistische concurrency. current = de rij zoals hij nu in de Sheet staat (lijst), None = weg.
+    # Zonder wijzigingen door anderen sinds 'base' blijft de op zoals hij is. Anders schrijven we
+    # alleen de kolommen die wij veranderden (hun velden blijven staan) en slaan we een delete
+    # van een intussen aangepaste rij over. -> (op of None, kolommen die beide kanten wijzigden)
+    base = op.get('base')
+    if not base: return op, []
+    if current is None: return None, []  # intussen verwijderd: niet opnieuw aanmaken
+    cur = lambda c: current[c - 1] if c <= len(current) else ''
+    elsewhere = {c for c, v in base.items() if not same_value(cur(c), v)}
+    if not elsewhere: return op, []
+    if op['kind'] == 'delete': return None, sorted(elsewhere)
+    mine = op['cells'] if op['kind'] == 'cells' else dict(enumerate(op['row'], start=1))
+    ours = {c: v for c, v in mine.items() if c not in base or not same_value(v, base[c])}
+    conflicts = sorted(c for c in ours if c in elsewhere and not same_value(ours[c], cur(c)))
+    if not ours: return None, conflicts
+    rebased = {k: v for k, v in op.items() if k != 'row'}
+    rebased.update(kind='cells', cells=ours)
+    return rebased, conflicts
+
+
+class WriteBehindQueue:
+    def __init__(self, flush_fn, debounce=0.3, min_interval=1.0, history=20):
+        self.flush_fn = flush_fn
+        self.debounce = debounce
+        self.min_interval = min_interval
+        self.pending = {}
+        self.inflight = {}
+        self.cond = threading.Condition()
+        self.state = 'idle'
+        self.coalesced = 0
+        self.flush_count = 0
+        self.failures = 0
+        self.history = deque(maxlen=history)
+        self.dropped = deque(maxlen=history)
+        self.drop_seq = 0
+        self.last_flush_at = 0.0
+        self.thread = threading.Thread(target=self._run, name="sheets-write-behind", daemon=True)
+        self.thread.start()
+
+    def submit(self, ops):
+        with self.cond:
+            for op in ops:
+                key = (op['tab'], str(op['id']))
+                if key in self.pending:
+                    self.pending[key] = merge_ops(self.pending[key], op)
+                    self.coalesced += 1
+                else: self.pending[key] = op
+            self.cond.notify_all()
+
+    def pending_ops(self, tab=None):
+        # Nog niet geschreven (of net onderweg): lezers leggen deze over de gecachte data heen
+        with self.cond:
+            ops = list(self.inflight.values()) + list(self.pending.values())
+        return [op for op in ops if tab is None or op['tab'] == tab]
+
+    def wait_idle(self, timeout=30):
+        end = time.time() + timeout
+        with self.cond:
+            while self.pending or self.inflight:
+                left = end - time.time()
+                if left <= 0: return False
+                self.cond.wait(left)
+        return True
+
+    def status(self):
+        with self.cond:
+            return {
+                'state': self.state, 'pending': len(self.pending) + len(self.inflight),
+                'coalesced': self.coalesced, 'flushes': self.flush_count, 'failures': self.failures,
+                'last': self.history[-1] if self.history else None, 'history': list(self.history),
+                'dropped': list(self.dropped),
+            }
+
+    def _run(self):
+        backoff = 1.0
+        while True:
+            with self.cond:
+                while not self.pending: self.cond.wait()
+            # Even wachten zodat snelle klikken in dezelfde flush landen, en niet sneller dan het quotum
+            time.sleep(max(self.debounce, self.last_flush_at + self.min_interval - time.time()))
+            with self.cond:
+                self.inflight, self.pending = self.pending, {}
+                self.state = 'flushing'
+                batch = list(self.inflight.values())
+                self.flush_count += 1
+                entry = {'id': self.flush_count, 'started': time.time(), 'ops': len(batch), 'tabs': sorted({op['tab'] for op in batch}), 'ok': False, 'error': None}
+            retry = False
+            try:
+                self.flush_fn(batch)
+                entry['ok'] = True
+                backoff = 1.0
+            except Exception as e:
+                entry['error'] = str(e) or type(e).__name__
+                # Ook 401/404: de handles zijn dan weggegooid, de volgende poging opent ze opnieuw
+                retry = is_retryable(e) or is_stale_handle(e)
+            entry['duration'] = time.time() - entry['started']
+            self.last_flush_at = time.time()
+            with self.cond:
+                if not entry['ok']:
+                    self.failures += 1
+                    if retry:
+                        # Tijdelijk (429/5xx/netwerk): terug in de wachtrij, nieuwere mutaties blijven de baas
+                        for key, op in self.inflight.items():
+                            self.pending[key] = merge_ops(op, self.pending[key]) if key in self.pending else op
+                    else:
+                        # Blijvend (bv. tabblad weg, ongeldige range): niet eindeloos herhalen, wel onthouden
+                        self.drop_seq += 1
+                        entry['dropped'] = len(batch)
+                        self.dropped.append({'seq': self.drop_seq, 'at': time.time(), 'error': entry['error'],
+                                             'ops': [{'tab': op['tab'], 'id': op['id'], 'kind': op['kind'], 'origin': op.get('origin')} for op in batch]})
+                self.inflight = {}
+                self.state = 'idle' if entry['ok'] else 'error' if retry else 'dropped'
+                self.history.append(entry)
+                self.cond.notify_all()
+            if retry:
+                time.sleep(backoff); backoff = min(backoff * 2, 60)